@@ -0,0 +1,151 @@
+# ann_index.py
+# Pluggable nearest-neighbour search over an (n, dim) matrix of L2-normalised
+# embeddings (usually EmbeddingIndex.embeddings, which may be a memmap).
+#
+#   exact  brute-force inner product over every row (default, recall 1.0)
+#   ivf    inverted file: spherical k-means coarse quantizer, only the `nprobe`
+#          closest lists are scanned per query
+import os
+
+import numpy as np
+
+from embedding_index import SCORE_CHUNK_ROWS, dot_scores, top_k
+
+IVF_FILE = "ivf.npz"
+ASSIGN_CHUNK_ROWS = 65536
+ASSIGN_CHUNK_SCORES = 1 << 24  # cap a chunk's (rows x centroids) score block at 64 MB of float32
+
+
+class ExactSearch:
+    name = "exact"
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def search(self, queries, k):
+        """Return (scores, rows), both shaped (len(queries), k), best first."""
+        queries = np.asarray(queries, dtype=np.float32)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        # one (queries x chunk) product per corpus block, merged into a running top-k,
+        # so peak memory is len(queries) * SCORE_CHUNK_ROWS floats whatever the corpus size
+        for start in range(0, len(self.embeddings), SCORE_CHUNK_ROWS):
+            scores = dot_scores(self.embeddings[start:start + SCORE_CHUNK_ROWS], queries)
+            rows = top_k(scores, k)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, rows, axis=-1)], axis=1)
+            best_rows = np.concatenate([best_rows, rows + start], axis=1)
+            keep = top_k(best_scores, k)
+            best_scores = np.take_along_axis(best_scores, keep, axis=-1)
+            best_rows = np.take_along_axis(best_rows, keep, axis=-1)
+        return best_scores, best_rows
+
+
+def kmeans(x, n_clusters, iters=10, seed=0):
+    # spherical k-means: centroids are re-normalised so assignment is a max inner product
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float32)
+    centroids = x[rng.choice(len(x), size=n_clusters, replace=False)].copy()
+    for _ in range(iters):
+        # chunked like assign_lists: the full (sample x n_clusters) score matrix would be GBs at 1M rows
+        assign = assign_lists(x, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # re-seed empty clusters from random points so no list goes unused
+            sums[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+    return centroids.astype(np.float32)
+
+
+def assign_lists(embeddings, centroids, start=0):
+    out = np.empty(len(embeddings) - start, dtype=np.int32)
+    chunk = max(1, min(ASSIGN_CHUNK_ROWS, ASSIGN_CHUNK_SCORES // max(len(centroids), 1)))
+    for s in range(start, len(embeddings), chunk):
+        block = np.asarray(embeddings[s:s + chunk], dtype=np.float32)
+        out[s - start:s - start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+class IVFSearch:
+    name = "ivf"
+
+    def __init__(self, embeddings, centroids, assignments, nprobe=8):
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.assignments = assignments
+        self.nprobe = nprobe
+        # CSR layout: rows of list c are list_rows[list_offsets[c]:list_offsets[c + 1]]
+        self.list_rows = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=len(centroids))
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def train(cls, embeddings, n_lists=None, iters=10, sample_size=None, seed=0, nprobe=8):
+        n = len(embeddings)
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        sample_size = min(n, sample_size or max(64 * n_lists, 10000))
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(n, size=sample_size, replace=False))
+        sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+        centroids = kmeans(sample, n_lists, iters=iters, seed=seed)
+        return cls(embeddings, centroids, assign_lists(embeddings, centroids), nprobe=nprobe)
+
+    def save(self, index_dir):
+        np.savez(os.path.join(index_dir, IVF_FILE), centroids=self.centroids, assignments=self.assignments)
+
+    @classmethod
+    def load(cls, index_dir, embeddings, nprobe=8):
+        data = np.load(os.path.join(index_dir, IVF_FILE))
+        centroids, assignments = data["centroids"], data["assignments"]
+        if len(assignments) > len(embeddings):
+            raise ValueError("IVF lists cover more rows than the embedding index; retrain")
+        if len(assignments) < len(embeddings):
+            # rows appended to the index since training go to their nearest existing list
+            extra = assign_lists(embeddings, centroids, start=len(assignments))
+            assignments = np.concatenate([assignments, extra])
+        return cls(embeddings, centroids, assignments, nprobe=nprobe)
+
+    def search(self, queries, k):
+        queries = np.asarray(queries, dtype=np.float32)
+        nprobe = min(self.nprobe, self.n_lists)
+        probes = top_k(queries @ self.centroids.T, nprobe)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        for qi, lists in enumerate(probes):
+            cand = np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in lists])
+            if not len(cand):
+                continue
+            cand.sort()  # ascending rows keep memmap reads sequential
+            scores = np.asarray(self.embeddings[cand], dtype=np.float32) @ queries[qi]
+            best = top_k(scores, k)
+            all_scores[qi, :len(best)] = scores[best]
+            all_rows[qi, :len(best)] = cand[best]
+        return all_scores, all_rows
+
+
+BACKENDS = ("exact", "ivf")
+
+
+def load_backend(name, embeddings, index_dir=None, nprobe=8, n_lists=None):
+    """Return a search backend; an IVF quantizer is trained and cached in index_dir on first use."""
+    if name == "exact":
+        return ExactSearch(embeddings)
+    if name == "ivf":
+        if index_dir and os.path.exists(os.path.join(index_dir, IVF_FILE)):
+            backend = IVFSearch.load(index_dir, embeddings, nprobe=nprobe)
+            if n_lists is None or n_lists == backend.n_lists:
+                return backend
+        backend = IVFSearch.train(embeddings, n_lists=n_lists, nprobe=nprobe)
+        if index_dir:
+            backend.save(index_dir)
+        return backend
+    raise ValueError(f"Unknown search backend: {name} (choose from {', '.join(BACKENDS)})")
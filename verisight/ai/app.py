@@ -1,76 +1,37 @@
 # app.py
 import streamlit as st
-from bs4 import BeautifulSoup
 import requests
-import snscrape.modules.twitter as sntwitter
-from sentence_transformers import SentenceTransformer, util
-import spacy
-from urllib.parse import quote, urlparse
 import datetime
 import os
 from dotenv import load_dotenv
+import models
+import telemetry
+from pipeline import verify_claim
 
 # -----------------------
 # Load environment variables
 # -----------------------
 load_dotenv()
 TWITTER_BEARER = os.getenv("TWITTER_BEARER_TOKEN")  # For future Twitter API v2
+API_URL = os.getenv("VERISIGHT_API", "http://127.0.0.1:5000")
+METRICS_PORT = os.getenv("VERISIGHT_METRICS_PORT")  # e.g. 9101 to let Prometheus scrape this process
 
 # -----------------------
 # Load models
 # -----------------------
-nlp = spacy.load("en_core_web_sm")
-sbert = SentenceTransformer('all-MiniLM-L6-v2')
+# spaCy and SBERT live in models.py so they are loaded once per process, not on
+# every Streamlit rerun; the warm-up thread starts loading them as the page opens.
+@st.cache_resource(show_spinner=False)
+def start_model_warmup():
+    return models.warm_up(background=True)
 
-# -----------------------
-# Trusted sources
-# -----------------------
-TRUSTED_DOMAINS = {"bbc.co.uk","bbc.com","cnn.com","theguardian.com","nation.africa","standardmedia.co.ke"}
+start_model_warmup()
 
-# -----------------------
-# Helper functions
-# -----------------------
-def normalize(text):
-    doc = nlp(text)
-    ents = [(ent.text, ent.label_) for ent in doc.ents]
-    clean = " ".join([t.text for t in doc if not t.is_space])
-    return clean, ents
-
-def search_news_google_rss(query, limit=6):
-    q = quote(query)
-    url = f"https://news.google.com/rss/search?q={q}"
-    try:
-        resp = requests.get(url, timeout=8)
-        soup = BeautifulSoup(resp.content, "xml")
-        items = []
-        for item in soup.find_all("item")[:limit]:
-            items.append({
-                "title": item.title.text,
-                "link": item.link.text,
-                "pubDate": item.pubDate.text
-            })
-        return items
-    except Exception:
-        return []
-
-def semantic_similarity(claim, candidates):
-    if not candidates: return []
-    claim_emb = sbert.encode(claim, convert_to_tensor=True)
-    cand_embs = sbert.encode([c for c in candidates], convert_to_tensor=True)
-    sims = util.pytorch_cos_sim(claim_emb, cand_embs)[0].cpu().numpy().tolist()
-    return sims
-
-def source_score_from_url(url):
-    try:
-        dom = urlparse(url).netloc.replace("www.","")
-    except:
-        return 0.35
-    if any(d in dom for d in TRUSTED_DOMAINS): return 0.80
-    if dom.endswith(".gov") or "police" in dom: return 0.90
-    return 0.40
-
-def aggregate_confidence(s_source, s_sim, s_time=1.0, s_media=0.8):
-    return 0.35*s_source + 0.35*s_sim + 0.2*s_time + 0.1*s_media
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    return telemetry.serve_metrics(int(METRICS_PORT)) if METRICS_PORT else None
+
+start_metrics_server()
 
 # -----------------------
 # Streamlit UI
@@ -90,20 +51,75 @@ with st.expander("Welcome! Click to read about VeriSight"):
     """)
 
 # -----------------------
-# Sidebar (History)
+# Sidebar (Account & History)
 # -----------------------
-if 'history' not in st.session_state:
-    st.session_state.history = []
+# History is stored by the backend per user, so it survives restarts; signed-in
+# users also verify claims through the backend so they are recorded there.
+if 'token' not in st.session_state:
+    st.session_state.token = None
+if 'history_cursors' not in st.session_state:
+    st.session_state.history_cursors = [None]
+
+def auth_headers():
+    return {"Authorization": f"Bearer {st.session_state.token}"} if st.session_state.token else {}
 
 with st.sidebar:
-    st.subheader("History")
-    if st.session_state.history:
-        for i, h in enumerate(reversed(st.session_state.history)):
-            st.markdown(f"**{h['type'].capitalize()}** — {h['claim'][:50]}...")
-            st.markdown(f"Confidence: {h['badge']} ({round(h['top_conf'],3)})")
-            st.markdown("---")
+    if not st.session_state.token:
+        st.subheader("Sign in")
+        with st.form("login"):
+            username = st.text_input("Username")
+            password = st.text_input("Password", type="password")
+            if st.form_submit_button("Sign in"):
+                try:
+                    r = requests.post(f"{API_URL}/api/login", json={"username": username, "password": password})
+                    if r.status_code == 200:
+                        st.session_state.token = r.json()["token"]
+                        st.rerun()
+                    else:
+                        st.error(r.json().get("error", "Login failed"))
+                except Exception as e:
+                    st.error(f"Login request failed: {str(e)}")
+        st.info("Sign in to keep a history of your verifications.")
     else:
-        st.info("No history yet.")
+        st.subheader("History")
+        result_filter = st.selectbox("Result", ["All", "High", "Medium", "Low", "Real", "Fake", "pending"])
+        params = {"limit": 10}
+        if result_filter != "All":
+            params["result"] = result_filter
+        if st.session_state.history_cursors[-1]:
+            params["cursor"] = st.session_state.history_cursors[-1]
+        try:
+            r = requests.get(f"{API_URL}/api/history", params=params, headers=auth_headers())
+            page = r.json() if r.status_code == 200 else {"items": [], "next_cursor": None}
+        except Exception as e:
+            st.error(f"History request failed: {str(e)}")
+            page = {"items": [], "next_cursor": None}
+
+        for h in page["items"]:
+            when = datetime.datetime.fromtimestamp(h["created_at"]).strftime("%Y-%m-%d %H:%M")
+            st.markdown(f"**{h['kind'].capitalize()}** — {h['data'][:50]}...")
+            conf = f" ({round(h['confidence'],3)})" if h["confidence"] is not None else ""
+            st.markdown(f"Result: {h['result']}{conf} · {when}")
+            st.markdown("---")
+        if not page["items"]:
+            st.info("No history yet.")
+
+        col_prev, col_next = st.columns(2)
+        if len(st.session_state.history_cursors) > 1 and col_prev.button("Newer"):
+            st.session_state.history_cursors.pop()
+            st.rerun()
+        if page["next_cursor"] and col_next.button("Older"):
+            st.session_state.history_cursors.append(page["next_cursor"])
+            st.rerun()
+        if st.button("Sign out"):
+            st.session_state.token = None
+            st.session_state.history_cursors = [None]
+            st.rerun()
+
+    if models.is_loaded("embed_cache"):
+        c = models.get_embedding_cache().stats()
+        st.caption(f"Embedding cache: {c['hit_rate']:.0%} hits "
+                   f"({c['memory_hits']} memory, {c['disk_hits']} disk, {c['misses']} encoded)")
 
 # -----------------------
 # Main verification interface
@@ -123,11 +139,17 @@ if st.button("Verify"):
     if uploaded_file:
         try:
             files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-            response = requests.post("http://127.0.0.1:5000/api/verify", files=files)
+            # detection runs in the backend's worker tier; long-poll up to 30 s for the verdict
+            with telemetry.timed("app_media_request"):
+                response = requests.post(f"{API_URL}/api/verify", files=files, params={"wait": 30},
+                                         headers=auth_headers())
             if response.status_code == 200:
                 media_result = response.json()
                 st.success("Media verification successful!")
                 st.write(media_result)
+            elif response.status_code == 202:
+                media_result = response.json()
+                st.info(f"Media verification still {media_result['status']} (job {media_result['job_id']}).")
             else:
                 st.error(f"Error verifying media: {response.json().get('error')}")
         except Exception as e:
@@ -140,33 +162,20 @@ if st.button("Verify"):
         st.warning("No claim text entered. Only media verification performed.")
         st.stop()
     
-    with st.spinner("Normalising and searching..."):
-        clean_claim, ents = normalize(claim)
-        news = search_news_google_rss(clean_claim)
-        cand_texts = [n["title"] for n in news]
-        sims = semantic_similarity(clean_claim, cand_texts)
-
-        evidence = []
-        idx = 0
-        for n in news:
-            s_sim = sims[idx] if idx < len(sims) else 0.0
-            s_src = source_score_from_url(n["link"])
-            conf = aggregate_confidence(s_src, s_sim)
-            evidence.append({
-                "type":"news","title":n["title"],"link":n["link"],"pubDate":n["pubDate"],
-                "sim":round(s_sim,3),"src_score":round(s_src,2),"conf":round(conf,3)
-            })
-            idx+=1
-
-        if evidence:
-            top = sorted(evidence, key=lambda x: x["conf"], reverse=True)[0]
-            top_conf = top["conf"]
-        else:
-            top_conf = 0.0
-
-        badge = "Low"
-        if top_conf >= 0.75: badge="High"
-        elif top_conf >= 0.5: badge="Medium"
+    with st.spinner("Normalising and searching..."), telemetry.timed("app_claim_verify"):
+        verdict = None
+        if st.session_state.token:
+            try:
+                r = requests.post(f"{API_URL}/api/claims/verify", json={"claim": claim}, headers=auth_headers())
+                if r.status_code == 200:
+                    verdict, timings = r.json()["result"], r.json()["timings_ms"]
+            except Exception:
+                pass  # fall back to verifying locally
+        if verdict is None:
+            verdict, timings = verify_claim(claim)
+        clean_claim, ents = verdict["normalized"], verdict["entities"]
+        evidence = verdict["evidence"]
+        top_conf, badge = verdict["top_conf"], verdict["badge"]
 
     # -----------------------
     # Display results
@@ -176,17 +185,15 @@ if st.button("Verify"):
     st.markdown(f"**Normalised:** {clean_claim}")
     st.markdown(f"**Entities detected:** {ents}")
     st.markdown(f"**Top confidence (badge):** {badge} ({round(top_conf,3)})")
-    st.markdown("**Top evidence:**")
+    if verdict.get("nli"):
+        nli = verdict["nli"]
+        st.markdown(f"**NLI verdict:** {nli['verdict']} ({nli['confidence']}) — "
+                    f"{nli['cost']['model_pairs']} of {nli['candidates']} headlines scored by the model"
+                    + (", early exit" if nli["early_exit"] else ""))
+    st.markdown("**Top evidence:**" + (" (from the local evidence store)" if verdict.get("evidence_source") == "local" else ""))
     if evidence:
         for ev in evidence[:6]:
             st.markdown(f"- {ev['title']} — {ev['link']} (sim={ev['sim']}, src={ev['src_score']})")
     else:
         st.write("No evidence found.")
-
-    # Save to history
-    st.session_state.history.append({
-        "type": "claim",
-        "claim": claim,
-        "badge": badge,
-        "top_conf": top_conf
-    })
+    st.caption("Stage timings (ms): " + ", ".join(f"{k}={v}" for k, v in timings.items()))
@@ -0,0 +1,287 @@
+# cascade.py
+# Retrieve-then-verify: a cheap bi-encoder pass (SBERT cosine) ranks every
+# candidate evidence text, and only the top-k go through the FEVER RoBERTa
+# classifier, best first, a few pairs per forward pass. Scoring stops early
+# once one piece of evidence supports or refutes the claim with probability
+# >= the exit threshold. (claim, evidence) -> prediction results are cached in
+# an LRU backed by SQLite, so re-checking a claim against known headlines
+# costs no model time.
+#
+#   python cascade.py "claim text" --corpus corpus.jsonl --index corpus.index
+#   python cascade.py "claim text" --evidence "headline one" "headline two"
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import telemetry
+from embedding_cache import cosine_similarity
+
+LABELS = {0: "SUPPORTS", 1: "REFUTES", 2: "NOT ENOUGH INFO"}  # eval_inference.LABELS, without importing torch
+TOP_K = int(os.getenv("CASCADE_TOP_K", 8))
+NLI_BATCH = int(os.getenv("CASCADE_NLI_BATCH", 4))
+EARLY_EXIT = float(os.getenv("CASCADE_EARLY_EXIT", 0.9))
+# below this, neither side is convincing and the verdict is NOT ENOUGH INFO
+DECISION_THRESHOLD = float(os.getenv("CASCADE_DECISION_THRESHOLD", 0.5))
+NLI_SERVER_URL = os.getenv("NLI_SERVER_URL")  # use a running nli_server.py instead of loading the model here
+NLI_MODEL_DIR = os.getenv("NLI_MODEL_DIR", "fever-roberta-final")  # eval_inference.MODEL_DIR, without importing torch
+NLI_CACHE_DB = os.getenv("NLI_CACHE_DB",
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "cache", "nli.sqlite"))
+NLI_CACHE_SIZE = int(os.getenv("NLI_CACHE_SIZE", 50000))
+REMOTE_PROBE_SECONDS = 60  # how often an unreachable NLI server's /health is retried for its fingerprint
+
+
+def model_fingerprint(model_dir):
+    """Cache namespace for a checkpoint: its absolute path plus the size and mtime of every file in it.
+
+    Retraining or re-quantizing into the same directory changes the fingerprint,
+    so verdicts of the old weights are never served for the new ones.
+    """
+    path = os.path.abspath(model_dir)
+    h = hashlib.sha1(path.encode("utf-8"))
+    try:
+        entries = sorted(os.scandir(path), key=lambda e: e.name)
+    except OSError:
+        return path
+    for entry in entries:
+        if entry.is_file():
+            st = entry.stat()
+            h.update(f"\0{entry.name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return f"{path}@{h.hexdigest()[:16]}"
+
+
+def remote_model_id(url, timeout=5):
+    """The serving checkpoint's fingerprint from nli_server's /health, or None if it can't be read."""
+    import urllib.request
+    try:
+        with urllib.request.urlopen(url.rstrip("/") + "/health", timeout=timeout) as resp:
+            return json.loads(resp.read()).get("model_id")
+    except (OSError, ValueError):
+        return None
+
+
+class NLICache:
+    """(model, claim, evidence) -> (pred, probs), LRU in memory in front of SQLite."""
+
+    def __init__(self, model_id, max_items=NLI_CACHE_SIZE, db_path=None):
+        self.model_id = model_id
+        self.max_items = max_items
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS nli (key BLOB PRIMARY KEY, pred INTEGER, probs TEXT)")
+            self._db.commit()
+
+    def key(self, claim, evidence):
+        return hashlib.sha1(f"{self.model_id}\0{claim}\0{evidence}".encode("utf-8")).digest()
+
+    def get(self, claim, evidence):
+        key = self.key(claim, evidence)
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit is None and self._db is not None:
+                row = self._db.execute("SELECT pred, probs FROM nli WHERE key=?", (key,)).fetchone()
+                if row is not None:
+                    hit = (row[0], json.loads(row[1]))
+                    self._remember(key, hit)
+            elif hit is not None:
+                self._lru.move_to_end(key)
+            self._counts["hits" if hit is not None else "misses"] += 1
+        return hit
+
+    def put_many(self, items):
+        """items: [((claim, evidence), (pred, probs)), ...]"""
+        rows = []
+        with self._lock:
+            for (claim, evidence), value in items:
+                key = self.key(claim, evidence)
+                self._remember(key, value)
+                rows.append((key, value[0], json.dumps(value[1])))
+            if self._db is not None and rows:
+                self._db.executemany("INSERT OR REPLACE INTO nli (key, pred, probs) VALUES (?, ?, ?)", rows)
+                self._db.commit()
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._counts)
+            s["memory_items"] = len(self._lru)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+
+def local_nli(model_dir=NLI_MODEL_DIR):
+    def predict(pairs):
+        import eval_inference  # torch/transformers are only needed once a pair reaches the model
+        return eval_inference.infer_batch([c for c, _ in pairs], [e for _, e in pairs], model_dir=model_dir)
+    return predict
+
+
+def remote_nli(url):
+    def predict(pairs):
+        from nli_server import remote_predict
+        return [(p["pred"], p["probs"]) for p in remote_predict(pairs, url=url)]
+    return predict
+
+
+_nli = {}
+_nli_lock = threading.Lock()
+
+
+def get_nli():
+    """Process-wide (predict, cache) pair: the NLI server if NLI_SERVER_URL is set, else the local model.
+
+    While the server's checkpoint fingerprint is unknown (/health unreachable),
+    predictions go to a memory-only cache and /health is asked again every
+    REMOTE_PROBE_SECONDS, so nothing is persisted under a key that could
+    outlive a checkpoint swap behind the same URL.
+    """
+    with _nli_lock:
+        if "predict" not in _nli:
+            if NLI_SERVER_URL:
+                _nli["predict"] = remote_nli(NLI_SERVER_URL)
+            else:
+                _nli["predict"] = local_nli(NLI_MODEL_DIR)
+                _nli["cache"] = NLICache(model_fingerprint(NLI_MODEL_DIR), db_path=NLI_CACHE_DB or None)
+        if "cache" not in _nli or (_nli.get("provisional") and time.monotonic() - _nli["probed"] > REMOTE_PROBE_SECONDS):
+            model_id = remote_model_id(NLI_SERVER_URL)
+            _nli["probed"] = time.monotonic()
+            _nli["provisional"] = model_id is None
+            if model_id is not None:
+                _nli["cache"] = NLICache(model_id, db_path=NLI_CACHE_DB or None)
+            elif "cache" not in _nli:
+                _nli["cache"] = NLICache(f"unverified:{NLI_SERVER_URL}")  # memory only
+        return _nli["predict"], _nli["cache"]
+
+
+def top_k_order(sims, k):
+    """Indices of the k largest similarities, best first (argpartition, then sort only those)."""
+    sims = np.asarray(sims, dtype=np.float32)
+    k = min(k, len(sims))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-sims, k - 1)[:k]
+    return part[np.argsort(-sims[part], kind="stable")]
+
+
+def aggregate(scored):
+    """scored: [{"probs": [pS, pR, pN], ...}] -> (verdict, confidence)."""
+    if not scored:
+        return LABELS[2], 0.0
+    probs = np.array([s["probs"] for s in scored], dtype=np.float32)
+    best_support, best_refute = float(probs[:, 0].max()), float(probs[:, 1].max())
+    if max(best_support, best_refute) < DECISION_THRESHOLD:
+        return LABELS[2], round(float(probs[:, 2].max()), 4)
+    if best_support >= best_refute:
+        return LABELS[0], round(best_support, 4)
+    return LABELS[1], round(best_refute, 4)
+
+
+def verify(claim, candidates, sims=None, encode=None, top_k=TOP_K, batch_size=NLI_BATCH,
+           early_exit=EARLY_EXIT, nli=None, cache=None):
+    """Cascade one claim over candidate evidence texts.
+
+    sims: precomputed claim/candidate similarities (skips the encode step);
+    otherwise encode(texts) -> embeddings is called once for the claim and all
+    candidates. Returns the verdict, the scored evidence and per-stage costs.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    texts = list(candidates)
+
+    with telemetry.timed("cascade_retrieve"):
+        if sims is None and texts:
+            if encode is None:
+                import models
+                encode = models.get_embedding_cache().encode
+            embs = encode([claim] + texts)
+            sims = cosine_similarity(embs[0], embs[1:])
+        order = top_k_order(sims if texts else [], top_k)
+    timings["retrieve"] = round((time.perf_counter() - t0) * 1000.0, 2)
+
+    if nli is None or cache is None:
+        default_nli, default_cache = get_nli()
+        nli, cache = nli or default_nli, cache or default_cache
+
+    t1 = time.perf_counter()
+    scored, cost = [], {"model_pairs": 0, "cache_hits": 0, "batches": 0}
+    exited = False
+    with telemetry.timed("cascade_nli"):
+        for b in range(0, len(order), batch_size):
+            batch = [int(i) for i in order[b:b + batch_size]]
+            preds, todo = {}, []
+            for i in batch:
+                hit = cache.get(claim, texts[i])
+                if hit is None:
+                    todo.append(i)
+                else:
+                    preds[i] = hit
+                    cost["cache_hits"] += 1
+            if todo:
+                fresh = nli([(claim, texts[i]) for i in todo])
+                fresh = [(int(p), [float(x) for x in probs]) for p, probs in fresh]
+                cache.put_many([((claim, texts[i]), value) for i, value in zip(todo, fresh)])
+                preds.update(zip(todo, fresh))
+                cost["model_pairs"] += len(todo)
+                cost["batches"] += 1
+            for i in batch:
+                pred, probs = preds[i]
+                scored.append({"index": i, "text": texts[i], "sim": round(float(sims[i]), 4),
+                               "label": LABELS[pred], "probs": [round(p, 4) for p in probs]})
+            if max(max(s["probs"][0], s["probs"][1]) for s in scored) >= early_exit:
+                exited = len(scored) < len(order)
+                break
+    timings["nli"] = round((time.perf_counter() - t1) * 1000.0, 2)
+
+    verdict, confidence = aggregate(scored)
+    timings["total"] = round((time.perf_counter() - t0) * 1000.0, 2)
+    return {
+        "verdict": verdict,
+        "confidence": confidence,
+        "evidence": scored,
+        "early_exit": exited,
+        "candidates": len(texts),
+        "considered": len(order),
+        "cost": cost,
+        "timings_ms": timings,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieve-then-verify one claim")
+    parser.add_argument("claim")
+    parser.add_argument("--evidence", nargs="+", help="candidate evidence texts")
+    parser.add_argument("--corpus", help="JSONL corpus with {\"id\", \"text\"} (used with --index)")
+    parser.add_argument("--index", help="embedding_index directory for --corpus")
+    parser.add_argument("--retrieve-k", type=int, default=50, help="candidates pulled from the index")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--early-exit", type=float, default=EARLY_EXIT)
+    args = parser.parse_args()
+
+    if args.corpus:
+        import embedding_index
+        import models
+        import retrieve_sb_pdf
+        index = embedding_index.open_index(args.index, args.corpus)
+        hits = retrieve_sb_pdf.retrieve_indexed(args.claim, index, models.get_sbert(), top_k=args.retrieve_k)
+        out = verify(args.claim, [h["text"] for h in hits], sims=[h["score"] for h in hits],
+                     top_k=args.top_k, early_exit=args.early_exit)
+    else:
+        out = verify(args.claim, args.evidence or [], top_k=args.top_k, early_exit=args.early_exit)
+    print(json.dumps(out, indent=2))
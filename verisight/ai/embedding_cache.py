@@ -0,0 +1,107 @@
+# embedding_cache.py
+# Two-level cache for sentence embeddings: a bounded in-process LRU in front of
+# a persistent SQLite store of float32 BLOBs. Keys hash the model name together
+# with the text, so switching models never returns stale vectors. Only texts
+# missing from both levels are sent to the model, in a single batched encode.
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import telemetry
+
+
+def cache_key(model_name, text):
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, model, model_name, max_items=20000, db_path=None, batch_size=64):
+        self.model = model
+        self.model_name = model_name
+        self.max_items = max_items
+        self.batch_size = batch_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+            self._db.commit()
+
+    def _remember(self, key, vec):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, keys):
+        found = {}
+        for i in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+            chunk = keys[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[bytes(key)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def encode(self, texts):
+        """Return a float32 (len(texts), dim) array, encoding only the cache misses."""
+        keys = [cache_key(self.model_name, t) for t in texts]
+        vecs = {}
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    vecs[key] = self._lru[key]
+            self._counts["memory_hits"] += sum(1 for k in keys if k in vecs)
+
+            missing = list(dict.fromkeys(k for k in keys if k not in vecs))
+            if missing and self._db is not None:
+                with telemetry.timed("embed_cache_disk_get"):
+                    found = self._disk_get(missing)
+                for key, vec in found.items():
+                    vecs[key] = vec
+                    self._remember(key, vec)
+                self._counts["disk_hits"] += sum(1 for k in keys if k in found)
+
+        todo = {}
+        for key, text in zip(keys, texts):
+            if key not in vecs:
+                todo.setdefault(key, text)
+        if todo:
+            with telemetry.timed("sbert_encode"):
+                emb = self.model.encode(list(todo.values()), convert_to_numpy=True, batch_size=self.batch_size,
+                                        show_progress_bar=False)
+            emb = np.asarray(emb, dtype=np.float32)
+            with self._lock:
+                self._counts["misses"] += sum(1 for k in keys if k in todo)
+                for key, vec in zip(todo, emb):
+                    vecs[key] = vec
+                    self._remember(key, vec)
+                if self._db is not None:
+                    self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                                         [(k, v.tobytes()) for k, v in zip(todo, emb)])
+                    self._db.commit()
+
+        return np.stack([vecs[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._counts)
+            s["memory_items"] = len(self._lru)
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        s["hit_rate"] = (s["memory_hits"] + s["disk_hits"]) / lookups if lookups else 0.0
+        return s
+
+
+def cosine_similarity(query, matrix):
+    query = query / max(np.linalg.norm(query), 1e-12)
+    norms = np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)
+    return (matrix @ query) / norms
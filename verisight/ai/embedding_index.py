@@ -0,0 +1,230 @@
+# embedding_index.py
+# On-disk, memory-mapped sentence-embedding index for a JSONL corpus.
+#
+# Layout of an index directory:
+#   meta.json       model name, dtype, dim, row count, indexed corpus bytes + sha256
+#   embeddings.bin  raw (rows, dim) matrix of L2-normalised embeddings
+#   offsets.bin     raw int64 byte offset of each row's line in the corpus file
+#
+# Rows map 1:1 to the non-blank lines of the corpus, so the id/text of a hit is
+# read back from the corpus at its offset instead of keeping the corpus in RAM.
+import hashlib
+import json
+import os
+
+import numpy as np
+
+INDEX_VERSION = 1
+META_FILE = "meta.json"
+EMB_FILE = "embeddings.bin"
+OFFSETS_FILE = "offsets.bin"
+SCORE_CHUNK_ROWS = 32768
+
+
+class StaleIndexError(RuntimeError):
+    pass
+
+
+def file_sha256(path, limit=None, chunk_size=1 << 20):
+    """sha256 of the first `limit` bytes of a file (whole file if limit is None)."""
+    h = hashlib.sha256()
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            n = chunk_size if remaining is None else min(chunk_size, remaining)
+            block = f.read(n)
+            if not block:
+                break
+            h.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return h.hexdigest()
+
+
+def iter_corpus_lines(path, start=0):
+    # yields (byte_offset, record) for every non-blank JSONL line after `start`
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for raw in f:
+            if raw.strip():
+                yield offset, json.loads(raw)
+            offset += len(raw)
+
+
+def read_meta(index_dir):
+    path = os.path.join(index_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(index_dir, meta):
+    tmp = os.path.join(index_dir, META_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(index_dir, META_FILE))
+
+
+def index_status(corpus_path, index_dir, model_name, dtype=None):
+    """Return one of "missing", "stale", "append" or "fresh"."""
+    meta = read_meta(index_dir)
+    if meta is None:
+        return "missing"
+    if meta.get("version") != INDEX_VERSION or meta.get("model") != model_name:
+        return "stale"
+    if dtype is not None and meta.get("dtype") != np.dtype(dtype).name:
+        return "stale"
+    size = os.path.getsize(corpus_path)
+    if size < meta["corpus_bytes"]:
+        return "stale"
+    if file_sha256(corpus_path, limit=meta["corpus_bytes"]) != meta["corpus_sha256"]:
+        return "stale"
+    return "fresh" if size == meta["corpus_bytes"] else "append"
+
+
+class EmbeddingIndex:
+    def __init__(self, index_dir, corpus_path, meta):
+        self.index_dir = index_dir
+        self.corpus_path = corpus_path
+        self.meta = meta
+        rows, dim = meta["rows"], meta["dim"]
+        if rows:
+            # np.memmap maps the files read-only; nothing is copied into RAM up front
+            self.embeddings = np.memmap(os.path.join(index_dir, EMB_FILE), dtype=meta["dtype"],
+                                        mode="r", shape=(rows, dim))
+            self.offsets = np.memmap(os.path.join(index_dir, OFFSETS_FILE), dtype=np.int64,
+                                     mode="r", shape=(rows,))
+        else:
+            self.embeddings = np.zeros((0, dim), dtype=meta["dtype"])
+            self.offsets = np.zeros((0,), dtype=np.int64)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def model_name(self):
+        return self.meta["model"]
+
+    def records(self, rows):
+        out = []
+        with open(self.corpus_path, "rb") as f:
+            for r in rows:
+                f.seek(int(self.offsets[r]))
+                out.append(json.loads(f.readline()))
+        return out
+
+    def record(self, row):
+        return self.records([row])[0]
+
+
+def open_index(index_dir, corpus_path, model_name=None, verify=True):
+    meta = read_meta(index_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No embedding index found in {index_dir}")
+    if verify and model_name is not None:
+        status = index_status(corpus_path, index_dir, model_name)
+        if status != "fresh":
+            raise StaleIndexError(f"Embedding index {index_dir} is {status} for {corpus_path}")
+    return EmbeddingIndex(index_dir, corpus_path, meta)
+
+
+def _encode(model, texts):
+    emb = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(emb, dtype=np.float32)
+
+
+def _append_rows(corpus_path, index_dir, meta, model, start, batch_size):
+    dtype = np.dtype(meta["dtype"])
+    emb_path = os.path.join(index_dir, EMB_FILE)
+    off_path = os.path.join(index_dir, OFFSETS_FILE)
+    if meta["dim"] is not None:
+        # drop any rows written by an interrupted run that never made it into meta.json
+        for path, row_bytes in ((emb_path, meta["dim"] * dtype.itemsize), (off_path, 8)):
+            with open(path, "ab") as f:
+                f.truncate(meta["rows"] * row_bytes)
+
+    rows = first_row = meta["rows"]
+    with open(emb_path, "ab") as emb_f, open(off_path, "ab") as off_f:
+        offsets, texts = [], []
+
+        def flush():
+            emb = _encode(model, texts)
+            if meta["dim"] is None:
+                meta["dim"] = int(emb.shape[1])
+            emb_f.write(emb.astype(dtype).tobytes())
+            off_f.write(np.asarray(offsets, dtype=np.int64).tobytes())
+            return len(texts)
+
+        for offset, rec in iter_corpus_lines(corpus_path, start=start):
+            offsets.append(offset)
+            texts.append(rec["text"])
+            if len(texts) >= batch_size:
+                rows += flush()
+                offsets, texts = [], []
+        if texts:
+            rows += flush()
+
+    size = os.path.getsize(corpus_path)
+    meta.update(rows=rows, corpus_bytes=size, corpus_sha256=file_sha256(corpus_path, limit=size))
+    _write_meta(index_dir, meta)
+    return rows - first_row
+
+
+def build_index(corpus_path, index_dir, model, model_name, dtype="float16", batch_size=256):
+    """Encode the whole corpus from scratch into `index_dir`."""
+    os.makedirs(index_dir, exist_ok=True)
+    meta = {
+        "version": INDEX_VERSION,
+        "model": model_name,
+        "dtype": np.dtype(dtype).name,
+        "dim": None,
+        "rows": 0,
+        "corpus_bytes": 0,
+        "corpus_sha256": hashlib.sha256().hexdigest(),
+    }
+    for name in (EMB_FILE, OFFSETS_FILE):
+        open(os.path.join(index_dir, name), "wb").close()
+    for name in os.listdir(index_dir):
+        if name.endswith(".npz"):
+            # derived artefacts (ANN quantizers) were trained on the old rows
+            os.remove(os.path.join(index_dir, name))
+    _append_rows(corpus_path, index_dir, meta, model, 0, batch_size)
+    if meta["dim"] is None:
+        meta["dim"] = model.get_sentence_embedding_dimension()
+        _write_meta(index_dir, meta)
+    return EmbeddingIndex(index_dir, corpus_path, meta)
+
+
+def update_index(corpus_path, index_dir, model, model_name, dtype="float16", batch_size=256):
+    """Bring the index in line with the corpus: rebuild if stale, append new lines, or no-op."""
+    status = index_status(corpus_path, index_dir, model_name, dtype=dtype)
+    if status in ("missing", "stale"):
+        print(f"[index] {status} index at {index_dir}, building from {corpus_path}")
+        return build_index(corpus_path, index_dir, model, model_name, dtype=dtype, batch_size=batch_size)
+    meta = read_meta(index_dir)
+    if status == "append":
+        added = _append_rows(corpus_path, index_dir, meta, model, meta["corpus_bytes"], batch_size)
+        print(f"[index] appended {added} new corpus lines to {index_dir}")
+    return EmbeddingIndex(index_dir, corpus_path, meta)
+
+
+def dot_scores(embeddings, queries, chunk_rows=SCORE_CHUNK_ROWS):
+    """queries (q, dim) x embeddings (n, dim)^T -> float32 (q, n), upcasting one chunk at a time."""
+    queries = np.asarray(queries, dtype=np.float32)
+    out = np.empty((queries.shape[0], embeddings.shape[0]), dtype=np.float32)
+    for start in range(0, embeddings.shape[0], chunk_rows):
+        block = np.asarray(embeddings[start:start + chunk_rows], dtype=np.float32)
+        out[:, start:start + len(block)] = queries @ block.T
+    return out
+
+
+def top_k(scores, k):
+    # argpartition keeps the selection O(n); only the k winners get sorted
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
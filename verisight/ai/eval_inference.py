@@ -1,32 +1,165 @@
 # eval_inference.py
-import sys
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import argparse
+import json
+import os
+import time
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
 import torch
 
+import telemetry
+
 
 MODEL_DIR = "fever-roberta-final"
+MAX_LEN = 256
+LABELS = {0: "SUPPORTS", 1: "REFUTES", 2: "NOT ENOUGH INFO"}
+
+# written by quantize_model.py next to the fp32 checkpoint
+QUANT_CONFIG = "quantization.json"
+QUANT_WEIGHTS = "quantized_state_dict.pt"
+
+# model_dir -> (tokenizer, model); loading the checkpoint costs seconds, so do it once per process
+_MODELS = {}
+
+
+def quantized_dir(model_dir=MODEL_DIR):
+    return model_dir.rstrip("/\\") + "-int8"
+
 
+def quantize_dynamic(model):
+    # int8 weights for every nn.Linear, activations quantized on the fly (CPU only)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_model(model_dir=MODEL_DIR):
+    if model_dir not in _MODELS:
+        with telemetry.timed("nli_load"):
+            tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            if os.path.exists(os.path.join(model_dir, QUANT_CONFIG)):
+                # rebuild the fp32 graph from config, swap in quantized Linear modules, then load int8 weights
+                config = AutoConfig.from_pretrained(model_dir)
+                model = quantize_dynamic(AutoModelForSequenceClassification.from_config(config))
+                state = torch.load(os.path.join(model_dir, QUANT_WEIGHTS), map_location="cpu", weights_only=False)
+                model.load_state_dict(state)
+            else:
+                model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+            model.eval()
+        _MODELS[model_dir] = (tokenizer, model)
+    return _MODELS[model_dir]
 
 
 # simple inference
 
 
-def infer(claim, evidence_text):
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR)
-    model = AutoModelForSequenceClassification.from_pretrained(MODEL_DIR)
-    inputs = tokenizer(claim, evidence_text, truncation=True, max_length=256, return_tensors="pt")
-    with torch.no_grad():
+def infer_batch(claims, evidence_texts, model_dir=MODEL_DIR):
+    """Score several (claim, evidence) pairs in one padded forward pass -> [(pred, probs), ...]."""
+    tokenizer, model = load_model(model_dir)
+    with telemetry.timed("nli_tokenize"):
+        inputs = tokenizer(list(claims), list(evidence_texts), truncation=True, max_length=MAX_LEN,
+                           padding=True, return_tensors="pt")
+    with telemetry.timed("nli_forward"), torch.no_grad():
         outputs = model(**inputs)
     logits = outputs.logits
-    pred = torch.argmax(logits, dim=-1).item()
-    return pred, logits.softmax(dim=-1).cpu().numpy().tolist()[0]
+    preds = torch.argmax(logits, dim=-1).tolist()
+    probs = logits.softmax(dim=-1).cpu().numpy().tolist()
+    return list(zip(preds, probs))
+
+
+def infer(claim, evidence_text, model_dir=MODEL_DIR):
+    return infer_batch([claim], [evidence_text], model_dir=model_dir)[0]
+
+def _read_windows(path, window):
+    # JSONL of {"claim", "evidence", optional "id"}; at most `window` pairs in memory at once
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            items.append({"id": item.get("id", n), "claim": str(item["claim"]), "evidence": str(item["evidence"])})
+            if len(items) >= window:
+                yield items
+                items = []
+    if items:
+        yield items
+
+
+def _padded_tokens(lengths, batch_size):
+    return sum(max(lengths[i:i + batch_size]) * len(lengths[i:i + batch_size])
+               for i in range(0, len(lengths), batch_size))
+
+
+def bulk_score(in_path, out_path, model_dir=MODEL_DIR, batch_size=64, window=20000, threads=None):
+    """Score a JSONL file of pairs, batching by token length; predictions keep input order.
+
+    Pairs are tokenized a window at a time, sorted by length inside the window so each batch
+    pads to a similar length, and written back in their original order once the window is done.
+    """
+    if threads:
+        torch.set_num_threads(threads)
+    tokenizer, model = load_model(model_dir)
+    stats = {"pairs": 0, "real_tokens": 0, "padded_tokens": 0, "unsorted_padded_tokens": 0}
+    start = time.perf_counter()
+
+    with open(out_path, "w", encoding="utf-8") as out:
+        for items in _read_windows(in_path, window):
+            with telemetry.timed("nli_tokenize"):
+                enc = tokenizer([i["claim"] for i in items], [i["evidence"] for i in items],
+                                truncation=True, max_length=MAX_LEN)
+            lengths = [len(ids) for ids in enc["input_ids"]]
+            order = sorted(range(len(items)), key=lengths.__getitem__)
+            results = [None] * len(items)
+
+            for b in range(0, len(order), batch_size):
+                idx = order[b:b + batch_size]
+                features = [{k: enc[k][i] for k in enc.keys()} for i in idx]
+                inputs = tokenizer.pad(features, padding=True, return_tensors="pt")
+                with telemetry.timed("nli_forward"), torch.inference_mode():
+                    logits = model(**inputs).logits
+                preds = torch.argmax(logits, dim=-1).tolist()
+                probs = logits.softmax(dim=-1).cpu().numpy().tolist()
+                for i, pred, p in zip(idx, preds, probs):
+                    results[i] = (pred, p)
+                stats["padded_tokens"] += inputs["input_ids"].numel()
+
+            for item, (pred, p) in zip(items, results):
+                out.write(json.dumps({"id": item["id"], "label": LABELS[pred], "pred": pred, "probs": p}) + "\n")
+            stats["pairs"] += len(items)
+            stats["real_tokens"] += sum(lengths)
+            stats["unsorted_padded_tokens"] += _padded_tokens(lengths, batch_size)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["pairs_per_sec"] = stats["pairs"] / elapsed if elapsed else 0.0
+    stats["padding_efficiency"] = stats["real_tokens"] / max(stats["padded_tokens"], 1)
+    stats["unsorted_padding_efficiency"] = stats["real_tokens"] / max(stats["unsorted_padded_tokens"], 1)
+    return stats
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python eval_inference.py \"claim text\" \"evidence text\"")
-        sys.exit(1)
-    claim = sys.argv[1]
-    evidence = sys.argv[2]
-    pred, probs = infer(claim, evidence)
-    LABELS = {0: "SUPPORTS", 1: "REFUTES", 2: "NOT ENOUGH INFO"}
-    print("Prediction:", LABELS[pred], "Probs:", probs)
+    parser = argparse.ArgumentParser(usage="python eval_inference.py \"claim text\" \"evidence text\"\n"
+                                           "       python eval_inference.py --bulk pairs.jsonl --out preds.jsonl")
+    parser.add_argument("claim", nargs="?")
+    parser.add_argument("evidence", nargs="?")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--quantized", action="store_true", help="use the int8 export (<model-dir>-int8)")
+    parser.add_argument("--bulk", help="JSONL of {\"id\", \"claim\", \"evidence\"} to score offline")
+    parser.add_argument("--out", default="predictions.jsonl")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--window", type=int, default=20000, help="pairs length-sorted together")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+    if args.quantized:
+        args.model_dir = quantized_dir(args.model_dir)
+
+    if args.bulk:
+        stats = bulk_score(args.bulk, args.out, model_dir=args.model_dir, batch_size=args.batch_size,
+                           window=args.window, threads=args.threads)
+        print(f"Scored {stats['pairs']} pairs in {stats['seconds']:.1f}s "
+              f"({stats['pairs_per_sec']:.1f} pairs/s) -> {args.out}")
+        print(f"Padding efficiency: {stats['padding_efficiency']:.1%} "
+              f"(input order would be {stats['unsorted_padding_efficiency']:.1%})")
+    elif args.claim is None or args.evidence is None:
+        parser.print_usage()
+        raise SystemExit(1)
+    else:
+        pred, probs = infer(args.claim, args.evidence, model_dir=args.model_dir)
+        print("Prediction:", LABELS[pred], "Probs:", probs)
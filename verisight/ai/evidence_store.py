@@ -0,0 +1,256 @@
+# evidence_store.py
+# Local evidence store: every fetched headline and corpus sentence is kept in
+# SQLite with an FTS5 index (BM25) next to its SBERT embedding. Retrieval is
+# hybrid: a lexical prefilter picks a few hundred candidates in milliseconds,
+# then the stored embeddings rerank them by cosine similarity to the claim, so
+# only the claim itself is encoded per query.
+#
+#   python evidence_store.py ingest --corpus corpus.jsonl
+#   python evidence_store.py search "claim text" --k 5
+#   python evidence_store.py prune --days 30
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import telemetry
+from embedding_cache import cosine_similarity
+
+EVIDENCE_DB = os.getenv("EVIDENCE_DB",
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "cache", "evidence.sqlite"))
+PREFILTER_K = int(os.getenv("EVIDENCE_PREFILTER_K", 200))  # BM25 candidates reranked by embedding
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    link TEXT,
+    pub_date TEXT,
+    source TEXT,
+    added REAL NOT NULL,
+    vec BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evidence_kind_added ON evidence (kind, added);
+CREATE VIRTUAL TABLE IF NOT EXISTS evidence_fts USING fts5(
+    text, content='evidence', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS evidence_ai AFTER INSERT ON evidence BEGIN
+    INSERT INTO evidence_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS evidence_ad AFTER DELETE ON evidence BEGIN
+    INSERT INTO evidence_fts (evidence_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# too common to narrow a BM25 prefilter; everything else is OR-ed together
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have he her his in is it its of on or she that the their "
+    "they this to was were will with".split()
+)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(text):
+    """FTS5 MATCH string for free text: quoted terms OR-ed, so punctuation can't break the syntax."""
+    terms = [t for t in dict.fromkeys(_TOKEN.findall(text.lower())) if t not in STOPWORDS and len(t) > 1]
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+def _default_encode(texts):
+    import models
+    return models.get_embedding_cache().encode(texts)
+
+
+class EvidenceStore:
+    def __init__(self, db_path=EVIDENCE_DB, encode=None):
+        # encode(texts) -> float32 (n, dim); defaults to the shared SBERT embedding cache
+        self.encode = encode or _default_encode
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM evidence").fetchone()[0]
+
+    def _known(self, keys):
+        known = set()
+        for i in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+            chunk = keys[i:i + 500]
+            rows = self._db.execute(f"SELECT key FROM evidence WHERE key IN ({','.join('?' * len(chunk))})",
+                                    chunk).fetchall()
+            known.update(r[0] for r in rows)
+        return known
+
+    def add(self, items, vecs=None):
+        """items: [{"key", "kind", "text", "link"?, "pubDate"?, "source"?}]; returns how many were new.
+
+        Only texts not already stored are encoded (or pass vecs aligned with items).
+        Items already stored get their `added` time refreshed, so a headline the
+        feeds still return is not aged out of max_age searches or pruned.
+        """
+        keys = [it["key"] for it in items]
+        with self._lock:
+            known = self._known(keys)
+        fresh, seen = [], set()
+        for i, it in enumerate(items):
+            if it["key"] not in known and it["key"] not in seen and it["text"].strip():
+                seen.add(it["key"])
+                fresh.append(i)
+        now = time.time()
+        if known:
+            self._touch(sorted(known), now)
+        if not fresh:
+            return 0
+        if vecs is None:
+            with telemetry.timed("evidence_encode"):
+                emb = np.asarray(self.encode([items[i]["text"] for i in fresh]), dtype=np.float32)
+        else:
+            emb = np.asarray(vecs, dtype=np.float32)[fresh]
+        rows = [(items[i]["key"], items[i]["kind"], items[i]["text"], items[i].get("link"), items[i].get("pubDate"),
+                 items[i].get("source"), now, v.tobytes()) for i, v in zip(fresh, emb)]
+        with self._lock, telemetry.timed("evidence_insert"):
+            with self._db:
+                cur = self._db.executemany(
+                    "INSERT INTO evidence (key, kind, text, link, pub_date, source, added, vec) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO NOTHING", rows)
+                inserted = cur.rowcount
+        if inserted < len(rows):
+            # another process stored some of these keys since _known(); keep its rows, refresh their time
+            self._touch([r[0] for r in rows], now)
+        return inserted
+
+    def _touch(self, keys, now):
+        with self._lock, self._db:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                self._db.execute(f"UPDATE evidence SET added=? WHERE key IN ({','.join('?' * len(chunk))})",
+                                 [now, *chunk])
+
+    def add_news(self, news, vecs=None):
+        """Store news_search results, keyed by normalised link."""
+        from news_search import normalize_link
+        return self.add([{"key": normalize_link(n["link"]), "kind": "news", "text": n["title"],
+                          "link": n["link"], "pubDate": n.get("pubDate", ""), "source": n.get("source")}
+                         for n in news if n.get("link")], vecs)
+
+    def add_corpus(self, path, batch_size=1024):
+        """Ingest a JSONL corpus of {"id", "text"}; re-running only encodes unseen ids."""
+        added, batch = 0, []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                batch.append({"key": f"corpus:{rec['id']}", "kind": "corpus", "text": rec["text"],
+                              "source": os.path.basename(path)})
+                if len(batch) == batch_size:
+                    added += self.add(batch)
+                    batch = []
+        if batch:
+            added += self.add(batch)
+        return added
+
+    def candidates(self, query, limit=PREFILTER_K, kind=None, max_age=None):
+        """BM25 prefilter -> [(id, bm25, row...)], best lexical match first."""
+        expr = match_expression(query)
+        if not expr:
+            return []
+        sql = ("SELECT e.id, bm25(evidence_fts), e.kind, e.text, e.link, e.pub_date, e.source, e.vec "
+               "FROM evidence_fts JOIN evidence e ON e.id = evidence_fts.rowid WHERE evidence_fts MATCH ?")
+        params = [expr]
+        if kind:
+            sql += " AND e.kind = ?"
+            params.append(kind)
+        if max_age is not None:
+            # corpus sentences don't go stale; news does
+            sql += " AND (e.kind != 'news' OR e.added >= ?)"
+            params.append(time.time() - max_age)
+        sql += " ORDER BY bm25(evidence_fts) LIMIT ?"
+        params.append(limit)
+        with self._lock, telemetry.timed("evidence_bm25"):
+            return self._db.execute(sql, params).fetchall()
+
+    def search(self, query, k=5, prefilter=PREFILTER_K, kind=None, max_age=None, query_vec=None):
+        """Hybrid search: BM25 candidates reranked by stored-embedding cosine similarity."""
+        rows = self.candidates(query, limit=prefilter, kind=kind, max_age=max_age)
+        if not rows:
+            return []
+        if query_vec is None:
+            query_vec = np.asarray(self.encode([query]), dtype=np.float32)[0]
+        with telemetry.timed("evidence_rerank"):
+            matrix = np.stack([np.frombuffer(r[7], dtype=np.float32) for r in rows])
+            sims = cosine_similarity(query_vec, matrix)
+            k = min(k, len(rows))
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top], kind="stable")]
+        return [{"id": rows[i][0], "kind": rows[i][2], "title": rows[i][3], "link": rows[i][4] or "",
+                 "pubDate": rows[i][5] or "", "source": rows[i][6], "bm25": round(float(rows[i][1]), 4),
+                 "sim": float(sims[i])} for i in top]
+
+    def prune_news(self, older_than):
+        """Delete news rows added more than older_than seconds ago; returns the count."""
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM evidence WHERE kind='news' AND added < ?",
+                                    (time.time() - older_than,)).rowcount
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute("SELECT kind, COUNT(*) FROM evidence GROUP BY kind").fetchall()
+        return {kind: n for kind, n in rows}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EvidenceStore()
+        return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local hybrid (BM25 + SBERT) evidence store")
+    parser.add_argument("--db", default=EVIDENCE_DB)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="add a JSONL corpus of {\"id\", \"text\"}")
+    ing.add_argument("--corpus", required=True)
+    ing.add_argument("--batch-size", type=int, default=1024)
+    q = sub.add_parser("search", help="hybrid search")
+    q.add_argument("query")
+    q.add_argument("--k", type=int, default=5)
+    q.add_argument("--prefilter", type=int, default=PREFILTER_K)
+    q.add_argument("--kind", choices=["news", "corpus"])
+    pr = sub.add_parser("prune", help="delete news not re-fetched for this many days")
+    pr.add_argument("--days", type=float, default=30)
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    store = EvidenceStore(args.db)
+    if args.cmd == "ingest":
+        t0 = time.perf_counter()
+        n = store.add_corpus(args.corpus, batch_size=args.batch_size)
+        print(f"Added {n} sentences in {time.perf_counter() - t0:.1f} s ({len(store)} stored)")
+    elif args.cmd == "search":
+        t0 = time.perf_counter()
+        hits = store.search(args.query, k=args.k, prefilter=args.prefilter, kind=args.kind)
+        for h in hits:
+            print(f"{h['sim']:.3f}  bm25={h['bm25']:.2f}  [{h['kind']}] {h['title']}")
+        print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    elif args.cmd == "prune":
+        print(f"Removed {store.prune_news(args.days * 24 * 3600)} news items ({len(store)} stored)")
+    else:
+        print(json.dumps(store.stats()))
@@ -0,0 +1,71 @@
+# models.py
+# Process-wide model singletons. Streamlit re-executes app.py on every widget
+# interaction, but imported modules stay in sys.modules, so anything held here
+# is loaded once per process. The heavy libraries are only imported on first use.
+import os
+import threading
+
+import telemetry
+
+SPACY_MODEL = "en_core_web_sm"
+SBERT_MODEL = "all-MiniLM-L6-v2"
+EMBED_CACHE_DB = os.getenv("EMBED_CACHE_DB",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "cache", "embeddings.sqlite"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 20000))
+
+_models = {}
+_locks = {"nlp": threading.Lock(), "sbert": threading.Lock(), "embed_cache": threading.Lock()}
+
+
+def _get(key, loader):
+    model = _models.get(key)
+    if model is None:
+        with _locks[key]:  # concurrent sessions wait for the one load instead of racing it
+            model = _models.get(key)
+            if model is None:
+                with telemetry.timed(f"load_{key}"):
+                    model = _models[key] = loader()
+    return model
+
+
+def _load_nlp():
+    from normalizer import load_trimmed
+    return load_trimmed(SPACY_MODEL)
+
+
+def _load_sbert():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SBERT_MODEL)
+
+
+def get_nlp():
+    return _get("nlp", _load_nlp)
+
+
+def get_sbert():
+    return _get("sbert", _load_sbert)
+
+
+def get_embedding_cache():
+    def load():
+        from embedding_cache import EmbeddingCache
+        return EmbeddingCache(get_sbert(), SBERT_MODEL, max_items=EMBED_CACHE_SIZE, db_path=EMBED_CACHE_DB or None)
+    return _get("embed_cache", load)
+
+
+def is_loaded(key):
+    return key in _models
+
+
+def warm_up(background=True):
+    """Load both models and run one tiny inference so the first real request is fast."""
+    def run():
+        get_nlp()("VeriSight warm-up.")
+        get_embedding_cache().encode(["VeriSight warm-up."])
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,203 @@
+# news_search.py
+# Fan-out news search over several RSS/Atom feeds with pooled keep-alive
+# connections, per-source timeouts, link de-duplication and a TTL cache.
+#
+# Sources come from NEWS_SOURCES (a JSON list, or a path to a JSON file) and
+# default to DEFAULT_SOURCES. Each source is {"name", "url", "timeout"} where
+# "url" contains a {query} placeholder, so tests can point it at a local server.
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import quote, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+import telemetry
+
+DEFAULT_SOURCES = [
+    {"name": "google-news", "url": "https://news.google.com/rss/search?q={query}", "timeout": 8},
+    {"name": "bing-news", "url": "https://www.bing.com/news/search?q={query}&format=rss", "timeout": 8},
+]
+CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", 900))
+CACHE_DB = os.getenv("NEWS_CACHE_DB")  # optional SQLite file backing the in-memory cache
+USER_AGENT = "VeriSight/1.0 (+news search)"
+
+
+def load_sources():
+    raw = os.getenv("NEWS_SOURCES")
+    if not raw:
+        return DEFAULT_SOURCES
+    if os.path.exists(raw):
+        with open(raw, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(raw)
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+def normalize_link(link):
+    p = urlparse(link.strip())
+    host = p.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{p.path.rstrip('/')}?{p.query}" if p.query else f"{host}{p.path.rstrip('/')}"
+
+
+class TTLCache:
+    """Thread-safe query -> results cache, optionally persisted to SQLite."""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=1024, db_path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS news_cache (key TEXT PRIMARY KEY, expires REAL, value TEXT)")
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            hit = self._items.get(key)
+            if hit and hit[0] > now:
+                return hit[1]
+            self._items.pop(key, None)
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT expires, value FROM news_cache WHERE key=?", (key,)).fetchone()
+            if not row or row[0] <= now:
+                return None
+            value = json.loads(row[1])
+            self._items[key] = (row[0], value)
+            return value
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        with self._lock:
+            if len(self._items) >= self.max_entries:
+                # drop the entry closest to expiry
+                self._items.pop(min(self._items, key=lambda k: self._items[k][0]))
+            self._items[key] = (expires, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO news_cache (key, expires, value) VALUES (?, ?, ?)",
+                                 (key, expires, json.dumps(value)))
+                self._db.execute("DELETE FROM news_cache WHERE expires <= ?", (time.time(),))
+                self._db.commit()
+
+
+def parse_feed(content, limit, source_name=None):
+    soup = BeautifulSoup(content, "xml")
+    items = []
+    for item in soup.find_all("item")[:limit]:  # RSS 2.0
+        if item.title and item.link:
+            items.append({
+                "title": item.title.text,
+                "link": item.link.text.strip(),
+                "pubDate": item.pubDate.text if item.pubDate else "",
+                "source": source_name,
+            })
+    if not items:
+        for entry in soup.find_all("entry")[:limit]:  # Atom
+            link = entry.find("link")
+            href = link.get("href") if link is not None else None
+            if entry.title and href:
+                date = entry.find("updated") or entry.find("published")
+                items.append({
+                    "title": entry.title.text,
+                    "link": href.strip(),
+                    "pubDate": date.text if date else "",
+                    "source": source_name,
+                })
+    return items
+
+
+class NewsSearcher:
+    def __init__(self, sources=None, cache=None, max_workers=8, pool_size=16):
+        self.sources = sources if sources is not None else load_sources()
+        self.cache = cache if cache is not None else TTLCache(db_path=CACHE_DB)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news")
+        # one keep-alive pool per host, shared by every search
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(len(self.sources), 1), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def _fetch(self, source, query, limit):
+        url = source["url"].format(query=quote(query))
+        with telemetry.timed("rss_fetch"):
+            resp = self.session.get(url, timeout=source.get("timeout", 8))
+            resp.raise_for_status()
+        with telemetry.timed("rss_parse"):
+            return parse_feed(resp.content, limit, source.get("name"))
+
+    @staticmethod
+    def merge(result_lists, limit):
+        # round-robin across sources so one feed cannot crowd out the rest; first link wins
+        merged, seen = [], set()
+        for rank in range(max((len(r) for r in result_lists), default=0)):
+            for results in result_lists:
+                if rank < len(results):
+                    key = normalize_link(results[rank]["link"])
+                    if key not in seen:
+                        seen.add(key)
+                        merged.append(results[rank])
+        return merged[:limit]
+
+    def search_many(self, queries, limit=6):
+        """Search several queries at once; (query, source) fetches share the worker pool.
+
+        Each fetch is bounded by its source's own request timeout, counted from
+        when it actually starts, so fetches still queued behind a large batch
+        are waited for rather than cancelled.
+        """
+        out = {}
+        pending = {}
+        for query in queries:
+            key = normalize_query(query)
+            if key in out or key in pending:
+                continue
+            cached = self.cache.get(f"{key}|{limit}")
+            if cached is not None:
+                out[key] = cached
+            else:
+                pending[key] = [self.executor.submit(self._fetch, s, query, limit) for s in self.sources]
+
+        if pending:
+            wait([f for futs in pending.values() for f in futs])
+        for key, futs in pending.items():
+            lists, ok = [], False
+            for f in futs:
+                if f.exception() is None:
+                    lists.append(f.result())
+                    ok = True
+                else:
+                    lists.append([])  # this source failed (timeout, HTTP error, bad feed)
+            out[key] = self.merge(lists, limit)
+            if ok:  # every source has answered or failed; don't cache a full outage
+                self.cache.set(f"{key}|{limit}", out[key])
+        return [out[normalize_query(q)] for q in queries]
+
+    def search(self, query, limit=6):
+        return self.search_many([query], limit=limit)[0]
+
+
+_searcher = None
+_searcher_lock = threading.Lock()
+
+
+def get_searcher():
+    global _searcher
+    with _searcher_lock:
+        if _searcher is None:
+            _searcher = NewsSearcher()
+        return _searcher
@@ -0,0 +1,183 @@
+# nli_server.py
+# Long-lived FEVER NLI service: loads the RoBERTa checkpoint once and groups
+# concurrent requests into micro-batches for a single forward pass.
+#
+#   python nli_server.py --port 8502 --max-batch-size 32 --max-wait-ms 10
+#   python nli_server.py --unix /tmp/verisight-nli.sock
+#
+#   POST /predict  {"claim": "...", "evidence": "..."}
+#              or  {"pairs": [{"claim": "...", "evidence": "..."}, ...]}
+#   GET  /health
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cascade import model_fingerprint
+from eval_inference import LABELS, MODEL_DIR, infer_batch, load_model, quantized_dir
+
+
+class MicroBatcher:
+    """Collects pairs from many request threads and runs them through infer_batch together.
+
+    A batch closes when it reaches max_batch_size or max_wait_ms after its first pair arrived.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, max_batch_size=32, max_wait_ms=10):
+        self.model_dir = model_dir
+        self.model_id = model_fingerprint(model_dir)  # clients key their NLI caches on this
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "pairs": 0}
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="nli-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, claim, evidence):
+        fut = Future()
+        self.pending.put((claim, evidence, fut))
+        return fut
+
+    def predict(self, pairs, timeout=None):
+        futures = [self.submit(c, e) for c, e in pairs]
+        with self._stats_lock:
+            self.stats["requests"] += 1
+        return [f.result(timeout=timeout) for f in futures]
+
+    def _collect(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = infer_batch([b[0] for b in batch], [b[1] for b in batch], model_dir=self.model_dir)
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            with self._stats_lock:
+                self.stats["batches"] += 1
+                self.stats["pairs"] += len(batch)
+            for (_, _, fut), res in zip(batch, results):
+                fut.set_result(res)
+
+
+def format_prediction(pred, probs):
+    return {"label": LABELS[pred], "pred": pred, "probs": probs}
+
+
+class NLIRequestHandler(BaseHTTPRequestHandler):
+    batcher = None  # set by make_server
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # unix-socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "model": self.batcher.model_dir, "model_id": self.batcher.model_id,
+                             **self.batcher.stats})
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "Invalid JSON"})
+            return
+        if not isinstance(data, dict):
+            self._send(400, {"error": "Expected a JSON object"})
+            return
+
+        single = "pairs" not in data
+        items = [data] if single else data["pairs"]
+        if not isinstance(items, list) or not all(isinstance(i, dict) and "claim" in i and "evidence" in i for i in items):
+            self._send(400, {"error": "Expected claim and evidence"})
+            return
+
+        try:
+            results = self.batcher.predict([(str(i["claim"]), str(i["evidence"])) for i in items])
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+            return
+        predictions = [format_prediction(p, probs) for p, probs in results]
+        self._send(200, predictions[0] if single else {"predictions": predictions})
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(batcher, host="127.0.0.1", port=8502, unix_socket=None):
+    handler = type("BoundNLIRequestHandler", (NLIRequestHandler,), {"batcher": batcher})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def remote_predict(pairs, url="http://127.0.0.1:8502", timeout=30):
+    """Client helper: [(claim, evidence), ...] -> [{"label", "pred", "probs"}, ...]."""
+    body = json.dumps({"pairs": [{"claim": c, "evidence": e} for c, e in pairs]}).encode("utf-8")
+    req = urllib.request.Request(url.rstrip("/") + "/predict", data=body,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())["predictions"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--quantized", action="store_true", help="serve the int8 export (<model-dir>-int8)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    if args.quantized:
+        args.model_dir = quantized_dir(args.model_dir)
+
+    print("Loading", args.model_dir)
+    load_model(args.model_dir)  # pay the load before accepting traffic
+    batcher = MicroBatcher(args.model_dir, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    server = make_server(batcher, host=args.host, port=args.port, unix_socket=args.unix)
+    print("NLI server listening on", args.unix or f"http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,35 @@
+# normalizer.py
+# Claim/headline normalisation with a trimmed spaCy pipeline. Only tokens and
+# named entities are used downstream, so the tagger, parser, lemmatizer and
+# friends are never loaded, and bulk callers go through nlp.pipe.
+import os
+
+SPACY_MODEL = "en_core_web_sm"
+EXCLUDE = ("tagger", "parser", "attribute_ruler", "lemmatizer", "senter")
+BATCH_SIZE = int(os.getenv("NORMALIZE_BATCH_SIZE", 64))
+N_PROCESS = int(os.getenv("NORMALIZE_N_PROCESS", 1))
+
+
+def load_trimmed(model=SPACY_MODEL):
+    import spacy
+    nlp = spacy.load(model, exclude=list(EXCLUDE))
+    # the shared tok2vec only feeds the excluded components in the small English model;
+    # ner carries its own embedding layer, so skip tok2vec when nothing listens to it
+    if "tok2vec" in nlp.pipe_names and not getattr(nlp.get_pipe("tok2vec"), "listening_components", None):
+        nlp.disable_pipe("tok2vec")
+    return nlp
+
+
+def _result(doc):
+    ents = [(ent.text, ent.label_) for ent in doc.ents]
+    clean = " ".join([t.text for t in doc if not t.is_space])
+    return clean, ents
+
+
+def normalize(text, nlp):
+    return _result(nlp(text))
+
+
+def normalize_batch(texts, nlp, batch_size=BATCH_SIZE, n_process=N_PROCESS):
+    """[(clean_text, [(entity_text, label), ...]), ...] in input order."""
+    return [_result(doc) for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process)]
@@ -0,0 +1,209 @@
+# pipeline.py
+# Headless claim verification: normalize -> news search -> semantic similarity
+# -> source/recency score -> aggregate confidence -> badge. Used by the Streamlit app
+# and by the Flask backend's /api/claims/verify.
+#
+# verify_claims() runs each stage once for the whole batch: one nlp.pipe pass,
+# one concurrent search fan-out and one batched embedding call.
+#
+# Claims the local evidence store (evidence_store.py) can already answer skip
+# the network search; fetched headlines are added to the store for next time.
+#
+# With CASCADE_NLI=1 the top headlines also go through the FEVER NLI model
+# (cascade.verify, reusing the similarities computed here) and each result
+# gains an "nli" verdict.
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import evidence_store
+import models
+import news_search
+import normalizer
+import scoring
+import telemetry
+from embedding_cache import cosine_similarity
+
+# -----------------------
+# Settings (source trust lives in trust_registry.json, see scoring.py)
+# -----------------------
+SEARCH_LIMIT = 6
+CASCADE_NLI = os.getenv("CASCADE_NLI") == "1"
+EVIDENCE_STORE = os.getenv("EVIDENCE_STORE", "1") == "1"
+# a claim is answered locally when this many stored items are at least this similar
+EVIDENCE_MIN_SIM = float(os.getenv("EVIDENCE_MIN_SIM", 0.6))
+EVIDENCE_MIN_HITS = int(os.getenv("EVIDENCE_MIN_HITS", 3))
+EVIDENCE_MAX_AGE = int(os.getenv("EVIDENCE_MAX_AGE", 3 * 24 * 3600))  # stored news older than this is refetched
+# news no feed has returned for this long is deleted, checked at most once an hour while ingesting
+EVIDENCE_PRUNE_AGE = int(os.getenv("EVIDENCE_PRUNE_AGE", 10 * EVIDENCE_MAX_AGE))
+PRUNE_INTERVAL = 3600
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+# -----------------------
+# Helper functions
+# -----------------------
+def normalize(text):
+    return normalizer.normalize(text, models.get_nlp())
+
+def search_news_google_rss(query, limit=SEARCH_LIMIT):
+    # fans out to every configured feed (Google News first) through news_search,
+    # which pools connections and caches results per normalised query
+    try:
+        return news_search.get_searcher().search(query, limit=limit)
+    except Exception:
+        return []
+
+def search_local(queries, limit=SEARCH_LIMIT):
+    # {query: items} for the queries the local store answers well enough; the rest need the network
+    if not EVIDENCE_STORE:
+        return {}
+    found = {}
+    try:
+        store = evidence_store.get_store()
+        queries = list(dict.fromkeys(queries))
+        # the embed stage needs these vectors anyway, so this batch encode is not extra work
+        vecs = models.get_embedding_cache().encode(queries) if queries else []
+        for q, vec in zip(queries, vecs):
+            hits = store.search(q, k=limit, max_age=EVIDENCE_MAX_AGE, query_vec=vec)
+            hits = [h for h in hits if h["sim"] >= EVIDENCE_MIN_SIM]
+            if len(hits) >= min(EVIDENCE_MIN_HITS, limit):
+                found[q] = hits
+    except Exception:
+        return {}
+    return found
+
+def remember_news(news_lists):
+    global _last_prune
+    if not EVIDENCE_STORE:
+        return
+    try:
+        store = evidence_store.get_store()
+        store.add_news([n for news in news_lists for n in news])
+        with _prune_lock:  # claimed under the lock so concurrent requests prune once
+            due = time.time() - _last_prune > PRUNE_INTERVAL
+            if due:
+                _last_prune = time.time()
+        if due:
+            store.prune_news(EVIDENCE_PRUNE_AGE)
+    except Exception:
+        pass  # the store is an optimisation; never fail a verification over it
+
+def semantic_similarity(claim, candidates):
+    if not candidates: return []
+    # the same wire headlines recur across claims, so embeddings come from the cache
+    embs = models.get_embedding_cache().encode([claim] + list(candidates))
+    sims = cosine_similarity(embs[0], embs[1:]).tolist()
+    return sims
+
+def source_score_from_url(url):
+    # trust now comes from scoring's registry (trust_registry.json)
+    return scoring.get_registry().score(url)
+
+def aggregate_confidence(s_source, s_sim, s_time=1.0, s_media=scoring.MEDIA_SCORE):
+    return float(scoring.confidence(s_source, s_sim, s_time, s_media))
+
+def badge_for(top_conf):
+    if top_conf >= 0.75: return "High"
+    if top_conf >= 0.5: return "Medium"
+    return "Low"
+
+# -----------------------
+# Pipeline
+# -----------------------
+@contextmanager
+def stage(timings, name):
+    # per-call timings go back to the caller; the process-wide histogram feeds /metrics
+    t0 = time.perf_counter()
+    try:
+        with telemetry.timed(f"pipeline_{name}"):
+            yield
+    finally:
+        timings[name] = round(timings.get(name, 0.0) + (time.perf_counter() - t0) * 1000.0, 2)
+
+def score_evidence(news, sims, k=None):
+    """Evidence items for one claim, best confidence first (all of them unless k is given)."""
+    if not news:
+        return []
+    sims = list(sims) + [0.0] * (len(news) - len(sims))
+    s = scoring.score_candidates(sims[:len(news)], [n["link"] for n in news], [n["pubDate"] for n in news], k=k)
+    evidence = []
+    for idx in s["top"]:
+        n = news[idx]
+        evidence.append({
+            "type":"news","title":n["title"],"link":n["link"],"pubDate":n["pubDate"],
+            "sim":round(float(s["sim"][idx]),3),"src_score":round(float(s["source"][idx]),2),
+            "time_score":round(float(s["time"][idx]),3),"conf":round(float(s["conf"][idx]),3)
+        })
+    return evidence
+
+def verify_claims(claims, limit=SEARCH_LIMIT):
+    """Verify a batch of claim texts -> (results, timings_ms), results in input order."""
+    timings = {}
+    t_start = time.perf_counter()
+
+    with stage(timings, "normalize"):
+        normalized = normalizer.normalize_batch(claims, models.get_nlp())
+    clean_claims = [clean for clean, _ in normalized]
+
+    with stage(timings, "local_search"):
+        local = search_local(clean_claims, limit=limit)
+    remote = [c for c in clean_claims if c not in local]
+
+    with stage(timings, "search"):
+        fetched = {}
+        if remote:
+            try:
+                fetched = dict(zip(remote, news_search.get_searcher().search_many(remote, limit=limit)))
+            except Exception:
+                fetched = {}
+        news_lists = [local[c] if c in local else fetched.get(c, []) for c in clean_claims]
+
+    with stage(timings, "embed"):
+        # claims and every candidate title of the batch in one encode call
+        texts = list(dict.fromkeys(clean_claims + [n["title"] for news in news_lists for n in news]))
+        row = {t: i for i, t in enumerate(texts)}
+        embs = models.get_embedding_cache().encode(texts) if texts else None
+    if fetched:
+        with stage(timings, "store_ingest"):
+            remember_news(fetched.values())  # titles are in the embedding cache by now
+
+    results, claim_sims = [], []
+    with stage(timings, "score"):
+        for claim, (clean, ents), news in zip(claims, normalized, news_lists):
+            sims = []
+            if news:
+                cand = embs[[row[n["title"]] for n in news]]
+                sims = cosine_similarity(embs[row[clean]], cand).tolist()
+            claim_sims.append(sims)
+            evidence = score_evidence(news, sims)
+            top_conf = evidence[0]["conf"] if evidence else 0.0
+            results.append({
+                "claim": claim,
+                "normalized": clean,
+                "entities": ents,
+                "evidence": evidence,
+                "top_conf": top_conf,
+                "badge": badge_for(top_conf),
+                "evidence_source": "local" if clean in local else "network",
+            })
+
+    if CASCADE_NLI:
+        import cascade
+        with stage(timings, "nli"):
+            for res, news, sims in zip(results, news_lists, claim_sims):
+                # optional like the local store: a missing model or a down NLI server
+                # costs this claim its NLI verdict, not the whole batch its results
+                try:
+                    res["nli"] = cascade.verify(res["normalized"], [n["title"] for n in news], sims=sims)
+                except Exception as e:
+                    res["nli"] = None
+                    res["nli_error"] = str(e)
+
+    timings["total"] = round((time.perf_counter() - t_start) * 1000.0, 2)
+    return results, timings
+
+def verify_claim(claim, limit=SEARCH_LIMIT):
+    results, timings = verify_claims([claim], limit=limit)
+    return results[0], timings
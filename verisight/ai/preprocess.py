@@ -1,34 +1,107 @@
+import hashlib
 import json
 import os
-from datasets import Dataset
+import shutil
+from datasets import Dataset, Features, Value, load_from_disk
 
-def prepare_fever_split(split):
+LABEL_MAP = {"SUPPORTS": 0, "REFUTES": 1, "NOT ENOUGH INFO": 2}
+FEATURES = Features({"claim": Value("string"), "evidence": Value("string"), "label": Value("int64")})
+CACHE_DIR = os.getenv("FEVER_CACHE_DIR", "data/cache")
+CACHE_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def byte_shards(path, n):
+    """Split a file into n byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n):
+            f.seek(max(size * i // n, bounds[-1]))
+            f.readline()  # move to the start of the next full line
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def evidence_sentences(item, expand_evidence=False):
+    # FEVER evidence: [evidence_set][sentence_tuple][sentence_text]
+    evidence = item.get("evidence") or []
+    if not expand_evidence:
+        try:
+            return [evidence[0][0][2]]  # first evidence sentence only (simplified)
+        except Exception:
+            return [""]
+    seen = {}
+    for ev_set in evidence:
+        for sent in ev_set or []:
+            try:
+                text = sent[2]
+            except Exception:
+                continue
+            if text:
+                seen[text] = None
+    return list(seen) or [""]
+
+
+def generate_examples(shards, path, expand_evidence=False, digest=None):
+    # one pass, one line in memory at a time; `shards` is a list so from_generator can split it across processes.
+    # digest is unused here: it only puts the file's content into the datasets builder cache fingerprint
+    for start, end in shards:
+        with open(path, "rb") as f:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline()
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                claim = item.get("claim")
+                label = LABEL_MAP.get(item.get("label", "NOT ENOUGH INFO"), 2)
+                for evidence in evidence_sentences(item, expand_evidence):
+                    yield {"claim": claim, "evidence": evidence, "label": label}
+
+
+def prepare_fever_split(split, expand_evidence=False, num_proc=None, use_cache=True):
+    """Load data/fever.<split>.jsonl as a Dataset of {claim, evidence, label}.
+
+    expand_evidence emits one row per distinct evidence sentence instead of only the first one.
+    The processed split is saved under CACHE_DIR keyed by the source file's sha256, so later
+    runs load it straight from disk. num_proc parses the file in that many byte-range shards.
+    """
     local_path = f"data/fever.{split}.jsonl"
     if not os.path.exists(local_path):
         raise FileNotFoundError(f"Local FEVER file not found: {local_path}")
 
-    print(f"📘 Loading FEVER data locally from {local_path}")
-    with open(local_path, "r", encoding="utf-8") as f:
-        data = [json.loads(line) for line in f]
-
-    # FEVER format keys: claim, evidence, label
-    examples = []
-    for item in data:
-        claim = item.get("claim")
-        label = item.get("label", "NOT ENOUGH INFO")
-        # Extract only first evidence sentence (simplified)
-        if item.get("evidence"):
-            try:
-                first_evidence = item["evidence"][0][0][2]  # [evidence_set][sentence_tuple][sentence_text]
-            except Exception:
-                first_evidence = ""
-        else:
-            first_evidence = ""
-        examples.append({"claim": claim, "evidence": first_evidence, "label": label})
+    mode = "all" if expand_evidence else "first"
+    cache_path = None
+    # always hashed: from_generator's own builder cache only sees gen_kwargs, not the file behind `path`
+    digest = file_digest(local_path)[:16]
+    if use_cache:
+        cache_path = os.path.join(CACHE_DIR, f"fever.{split}.{mode}.v{CACHE_VERSION}.{digest}")
+        if os.path.isdir(cache_path):
+            print(f"📘 Loading cached FEVER {split} split from {cache_path}")
+            return load_from_disk(cache_path)
 
-    # Convert labels to numeric
-    label_map = {"SUPPORTS": 0, "REFUTES": 1, "NOT ENOUGH INFO": 2}
-    for ex in examples:
-        ex["label"] = label_map.get(ex["label"], 2)
+    print(f"📘 Loading FEVER data locally from {local_path}")
+    shards = byte_shards(local_path, max(1, num_proc or 1))
+    ds = Dataset.from_generator(
+        generate_examples,
+        features=FEATURES,
+        gen_kwargs={"shards": shards, "path": local_path, "expand_evidence": expand_evidence, "digest": digest},
+        num_proc=num_proc if num_proc and len(shards) > 1 else None,
+    )
 
-    return Dataset.from_list(examples)
+    if cache_path:
+        tmp_path = cache_path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        ds.save_to_disk(tmp_path)
+        os.replace(tmp_path, cache_path)
+        ds = load_from_disk(cache_path)
+    return ds
@@ -0,0 +1,151 @@
+# quantize_model.py
+# Export a dynamically quantized int8 copy of the FEVER RoBERTa classifier for
+# CPU-only inference, then check it against the fp32 model on the validation split.
+#
+#   python ai/quantize_model.py                       # fever-roberta-final -> fever-roberta-final-int8
+#   python ai/quantize_model.py --limit 0             # export only, skip the parity check
+#
+# Load it with `python ai/eval_inference.py --quantized ...`.
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import traceback
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from eval_inference import MODEL_DIR, QUANT_CONFIG, QUANT_WEIGHTS, infer_batch, load_model, quantize_dynamic, quantized_dir
+from preprocess import prepare_fever_split
+
+
+def export_quantized(model_dir=MODEL_DIR, out_dir=None):
+    out_dir = out_dir or quantized_dir(model_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    qmodel = quantize_dynamic(model)
+
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    torch.save(qmodel.state_dict(), os.path.join(out_dir, QUANT_WEIGHTS))
+    with open(os.path.join(out_dir, QUANT_CONFIG), "w", encoding="utf-8") as f:
+        json.dump({"method": "dynamic", "dtype": "qint8", "modules": ["Linear"], "source": model_dir}, f, indent=2)
+    return out_dir
+
+
+def dir_size_mb(path):
+    return sum(os.path.getsize(os.path.join(root, n)) for root, _, names in os.walk(path) for n in names) / 2 ** 20
+
+
+def _peak_rss_mb(proc):
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KiB on Linux
+    except ImportError:  # Windows
+        return proc.memory_info().peak_wset / 2 ** 20
+
+
+def _measure(model_dir, claims, evidences, batch_size, threads, results):
+    # runs in its own process so RSS reflects one model only
+    try:
+        import psutil
+        torch.set_num_threads(threads)
+        proc = psutil.Process()
+        base_rss = proc.memory_info().rss
+        load_model(model_dir)
+        loaded_rss = proc.memory_info().rss
+        preds = []
+        start = time.perf_counter()
+        for i in range(0, len(claims), batch_size):
+            preds.extend(p for p, _ in infer_batch(claims[i:i + batch_size], evidences[i:i + batch_size], model_dir=model_dir))
+        elapsed = time.perf_counter() - start
+        results.put({
+            "preds": preds,
+            "seconds": elapsed,
+            "model_rss_mb": (loaded_rss - base_rss) / 2 ** 20,
+            "peak_rss_mb": _peak_rss_mb(proc),
+        })
+    except BaseException:
+        results.put({"error": traceback.format_exc()})
+
+
+def measure(model_dir, claims, evidences, batch_size=16, threads=1, timeout=3600):
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(model_dir, claims, evidences, batch_size, threads, results))
+    p.start()
+    deadline = time.monotonic() + timeout
+    out = None
+    try:
+        while out is None:
+            try:
+                out = results.get(timeout=5)
+            except queue.Empty:
+                # a child killed outright (OOM, segfault) never reports back
+                if not p.is_alive():
+                    raise RuntimeError(f"measurement of {model_dir} died with exit code {p.exitcode}")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"measurement of {model_dir} took longer than {timeout}s")
+    finally:
+        if out is None:
+            p.terminate()
+        p.join()
+    if "error" in out:
+        raise RuntimeError(f"measurement of {model_dir} failed:\n{out['error']}")
+    return out
+
+
+def parity_check(model_dir, qdir, limit=2000, batch_size=16, threads=1):
+    ds = prepare_fever_split("validation")
+    if limit:
+        ds = ds.select(range(min(limit, len(ds))))
+    claims, evidences, labels = list(ds["claim"]), list(ds["evidence"]), list(ds["label"])
+
+    report = {"examples": len(labels), "threads": threads, "batch_size": batch_size}
+    runs = {}
+    for name, path in (("fp32", model_dir), ("int8", qdir)):
+        run = measure(path, claims, evidences, batch_size=batch_size, threads=threads)
+        runs[name] = run
+        report[name] = {
+            "accuracy": sum(p == y for p, y in zip(run["preds"], labels)) / len(labels),
+            "ms_per_example": 1000.0 * run["seconds"] / len(labels),
+            "model_rss_mb": run["model_rss_mb"],
+            "peak_rss_mb": run["peak_rss_mb"],
+            "disk_mb": dir_size_mb(path),
+        }
+    report["agreement"] = sum(a == b for a, b in zip(runs["fp32"]["preds"], runs["int8"]["preds"])) / len(labels)
+    report["accuracy_delta"] = report["int8"]["accuracy"] - report["fp32"]["accuracy"]
+    report["speedup"] = report["fp32"]["ms_per_example"] / max(report["int8"]["ms_per_example"], 1e-9)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--out-dir", default=None, help="default: <model-dir>-int8")
+    parser.add_argument("--limit", type=int, default=2000, help="validation examples for the parity check (0 = skip)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=1, help="torch threads for the latency comparison")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    args = parser.parse_args()
+
+    qdir = export_quantized(args.model_dir, args.out_dir)
+    print("Quantized model written to", qdir)
+    if args.limit:
+        report = parity_check(args.model_dir, qdir, limit=args.limit, batch_size=args.batch_size, threads=args.threads)
+        with open(os.path.join(qdir, "parity_report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        for name in ("fp32", "int8"):
+            r = report[name]
+            print(f"{name}: acc={r['accuracy']:.4f}  {r['ms_per_example']:.1f} ms/ex  "
+                  f"model RSS={r['model_rss_mb']:.0f} MB  peak RSS={r['peak_rss_mb']:.0f} MB  disk={r['disk_mb']:.0f} MB")
+        print(f"agreement={report['agreement']:.4f}  accuracy delta={report['accuracy_delta']:+.4f}  "
+              f"speedup={report['speedup']:.2f}x")
+        if report["accuracy_delta"] < -args.max_accuracy_drop:
+            raise SystemExit(f"int8 accuracy dropped more than {args.max_accuracy_drop:.2%}; keep using fp32")
@@ -2,6 +2,10 @@
 from sentence_transformers import SentenceTransformer, util
 import json
 import argparse
+import sys
+import embedding_index
+import ann_index
+import telemetry
 
 MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
@@ -19,8 +23,14 @@ def encode_corpus(corpus, model):
     return emb
 
 def retrieve(claim, corpus, corpus_emb, model, top_k=5):
-    q_emb = model.encode(claim, convert_to_tensor=True)
-    hits = util.semantic_search(q_emb, corpus_emb, top_k=top_k)[0]
+    # corpus may be an EmbeddingIndex, in which case corpus_emb is an optional
+    # ann_index search backend (exact by default) and only the claim gets encoded.
+    if isinstance(corpus, embedding_index.EmbeddingIndex):
+        return retrieve_indexed(claim, corpus, model, top_k=top_k, backend=corpus_emb)
+    with telemetry.timed("sbert_encode"):
+        q_emb = model.encode(claim, convert_to_tensor=True)
+    with telemetry.timed("retrieval_search"):
+        hits = util.semantic_search(q_emb, corpus_emb, top_k=top_k)[0]
     results = []
     for h in hits:
         idx = h['corpus_id']
@@ -28,15 +38,97 @@ def retrieve(claim, corpus, corpus_emb, model, top_k=5):
         results.append({"id": corpus[idx]["id"], "text": corpus[idx]["text"], "score": float(score)})
     return results
 
+def retrieve_indexed(claim, index, model, top_k=5, backend=None):
+    return retrieve_batch([claim], index, model, top_k=top_k, backend=backend)[0]
+
+def retrieve_batch(claims, index, model, top_k=5, backend=None):
+    # one encode call and one claims x corpus scoring pass for the whole batch
+    backend = backend or ann_index.ExactSearch(index.embeddings)
+    with telemetry.timed("sbert_encode"):
+        q_emb = model.encode(claims, convert_to_numpy=True, normalize_embeddings=True, batch_size=len(claims))
+    with telemetry.timed("retrieval_search"):
+        scores, rows = backend.search(q_emb, top_k)
+    keep = rows >= 0
+    with telemetry.timed("retrieval_records"):
+        records = iter(index.records(rows[keep]))
+    batch = []
+    for q_scores, q_keep in zip(scores, keep):
+        results = []
+        for score in q_scores[q_keep]:
+            rec = next(records)
+            results.append({"id": rec["id"], "text": rec["text"], "score": float(score)})
+        batch.append(results)
+    return batch
+
+def iter_claim_batches(path, batch_size):
+    # claims file is JSONL with {"claim": ...} and optionally "id"; read lazily
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            batch.append({"id": item.get("id", n), "claim": item["claim"]})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def retrieve_claims_file(path, out, index, model, top_k=5, backend=None, batch_size=64):
+    done = 0
+    for batch in iter_claim_batches(path, batch_size):
+        hits = retrieve_batch([c["claim"] for c in batch], index, model, top_k=top_k, backend=backend)
+        for item, results in zip(batch, hits):
+            out.write(json.dumps({"id": item["id"], "claim": item["claim"], "evidence": results}) + "\n")
+        out.flush()  # stream each batch as soon as it is scored
+        done += len(batch)
+    return done
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--corpus", default="corpus.jsonl")
-    parser.add_argument("--claim", required=True)
+    parser.add_argument("--claim")
+    parser.add_argument("--claims-file", help="JSONL of {\"id\", \"claim\"} to retrieve for in batches")
+    parser.add_argument("--out", help="JSONL output for --claims-file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=64, help="claims encoded and scored together")
     parser.add_argument("--topk", type=int, default=5)
+    parser.add_argument("--index", default=None, help="embedding index dir (default: <corpus>.index)")
+    parser.add_argument("--index-dtype", default="float16", choices=["float16", "float32"])
+    parser.add_argument("--build-index", action="store_true", help="build/refresh the index and exit")
+    parser.add_argument("--backend", default="exact", choices=ann_index.BACKENDS)
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists scanned per query")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF list count (default 4*sqrt(rows))")
+    parser.add_argument("--no-index", action="store_true", help="re-encode the corpus in memory (old behaviour)")
     args = parser.parse_args()
+    if not (args.claim or args.claims_file or args.build_index):
+        parser.error("one of --claim, --claims-file or --build-index is required")
+    if args.claims_file and args.no_index:
+        parser.error("--claims-file needs the embedding index; drop --no-index")
 
     model = SentenceTransformer(MODEL)
-    corpus = load_corpus(args.corpus)
-    emb = encode_corpus(corpus, model)
-    res = retrieve(args.claim, corpus, emb, model, top_k=args.topk)
-    print(res)
+    if args.no_index:
+        corpus = load_corpus(args.corpus)
+        emb = encode_corpus(corpus, model)
+        res = retrieve(args.claim, corpus, emb, model, top_k=args.topk)
+        print(res)
+    else:
+        index_dir = args.index or args.corpus + ".index"
+        # no-op when fresh, appends new corpus lines, rebuilds on model/checksum mismatch
+        index = embedding_index.update_index(args.corpus, index_dir, model, MODEL, dtype=args.index_dtype)
+        backend = ann_index.load_backend(args.backend, index.embeddings, index_dir=index_dir,
+                                         nprobe=args.nprobe, n_lists=args.nlist)
+        if args.build_index:
+            print(f"Index ready: {len(index)} rows in {index_dir} ({backend.name} search)")
+        elif args.claims_file:
+            out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+            try:
+                n = retrieve_claims_file(args.claims_file, out, index, model, top_k=args.topk,
+                                         backend=backend, batch_size=args.batch_size)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            print(f"Retrieved evidence for {n} claims", file=sys.stderr)
+        else:
+            res = retrieve(args.claim, index, backend, model, top_k=args.topk)
+            print(res)
@@ -0,0 +1,198 @@
+# scoring.py
+# Evidence scoring over arrays: source trust from a hot-reloadable registry,
+# recency from pubDate, and the weighted confidence, computed for every
+# candidate of a claim at once with top-k picked by argpartition.
+#
+# The registry (TRUST_REGISTRY, default trust_registry.json next to this file)
+# maps domains to scores. A host is looked up label by label from the most
+# specific suffix ("news.bbc.co.uk", "bbc.co.uk", "co.uk", "uk"), so cost is
+# bounded by the number of labels, not the registry size. Edits to the file
+# are picked up without a restart.
+import calendar
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+import numpy as np
+
+TRUST_REGISTRY = os.getenv("TRUST_REGISTRY",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "trust_registry.json"))
+RELOAD_CHECK_SECONDS = float(os.getenv("TRUST_RELOAD_CHECK", 2.0))  # how often the file's mtime is polled
+
+# confidence = w_source*s_source + w_sim*s_sim + w_time*s_time + w_media*s_media
+WEIGHTS = (0.35, 0.35, 0.2, 0.1)
+MEDIA_SCORE = 0.8
+HALF_LIFE_HOURS = float(os.getenv("EVIDENCE_HALF_LIFE_HOURS", 72))  # recency score halves every this many hours
+UNDATED_TIME_SCORE = 0.5
+
+# scheme://[user@]host[:port]... ; far cheaper than urlparse. _HOSTS does the
+# same for a newline-joined batch of links in one pass, one match per line.
+_HOST = re.compile(r"^[a-z][a-z0-9+.-]*://(?:[^@/?#]*@)?(\[[^\]/?#]*\]|[^:/?#]*)", re.IGNORECASE)
+_HOSTS = re.compile(r"^(?:[a-z][a-z0-9+.-]*://(?:[^@/?#\n]*@)?(\[[^\]/?#\n]*\]|[^:/?#\n]*))?[^\n]*$",
+                    re.IGNORECASE | re.MULTILINE)
+# the RSS date shape nearly every feed uses; anything else goes through email.utils / fromisoformat
+_RSS_DATE = re.compile(r"(?:[A-Za-z]{3}, )?(\d{1,2}) ([A-Za-z]{3}) (\d{4}) (\d{2}):(\d{2})(?::(\d{2}))? (GMT|UTC|Z|[+-]\d{4})$")
+_MONTHS = {m.lower(): i for i, m in enumerate(calendar.month_abbr) if m}
+
+
+class TrustRegistry:
+    def __init__(self, path=TRUST_REGISTRY, check_every=RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.check_every = check_every
+        self.version = 0
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._load({})
+        self.maybe_reload(force=True)
+
+    def _load(self, data):
+        self.default = float(data.get("default", 0.40))
+        self.unparseable = float(data.get("unparseable", 0.35))
+        self.domains = {d.lower().strip("."): float(s) for d, s in data.get("domains", {}).items()}
+        self.keywords = {k.lower(): float(s) for k, s in data.get("keywords", {}).items()}
+        self._hosts = {}  # host -> score memo, dropped on every reload
+        self.version += 1
+
+    def maybe_reload(self, force=False):
+        """Re-read the registry if its file changed; a broken edit keeps the previous registry."""
+        now = time.monotonic()
+        if not self.path or (not force and now - self._checked < self.check_every):
+            return False
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime  # a broken file is not re-parsed until it changes again
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return False
+            self._load(data)
+            return True
+
+    def host_score(self, host):
+        score = self._hosts.get(host)
+        if score is not None:
+            return score
+        labels = host.split(".")
+        for i in range(len(labels)):
+            score = self.domains.get(".".join(labels[i:]))
+            if score is not None:
+                break
+        else:
+            score = next((s for k, s in self.keywords.items() if k in host), self.default)
+        if len(self._hosts) < 100000:
+            self._hosts[host] = score
+        return score
+
+    def raw_host_score(self, host):
+        # host as it appears in the URL: any case, maybe www., maybe a bracketed IPv6 literal
+        host = host.lower()
+        if "[" in host and not host.endswith("]"):
+            return self.unparseable
+        if host.startswith("www."):
+            host = host[4:]
+        return self.host_score(host)
+
+    def score(self, url):
+        m = _HOST.match(url or "")
+        return self.raw_host_score(m.group(1) if m else "")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TrustRegistry()
+    _registry.maybe_reload()
+    return _registry
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value):
+    """RSS (RFC 822) or Atom (ISO 8601) date -> UTC epoch seconds, or None."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    m = _RSS_DATE.match(value)
+    if m and m.group(2).lower() in _MONTHS:
+        day, mon, year, hour, minute, sec, zone = m.groups()
+        offset = 0 if zone in ("GMT", "UTC", "Z") else (int(zone[1:3]) * 60 + int(zone[3:])) * (1 if zone[0] == "+" else -1)
+        return float(calendar.timegm((int(year), _MONTHS[mon.lower()], int(day), int(hour), int(minute), int(sec or 0)))
+                     - offset * 60)
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def source_scores(links, registry=None):
+    registry = registry or get_registry()
+    links = list(links)
+    hosts = _HOSTS.findall("\n".join(links)) if links else []
+    if len(hosts) != len(links):  # a link with a newline in it; score one by one
+        return np.fromiter((registry.score(link) for link in links), dtype=np.float32, count=len(links))
+    memo = {}
+    for host in hosts:
+        if host not in memo:
+            memo[host] = registry.raw_host_score(host)
+    return np.fromiter((memo[h] for h in hosts), dtype=np.float32, count=len(hosts))
+
+
+def time_scores(pub_dates, now=None, half_life_hours=HALF_LIFE_HOURS):
+    """Exponential decay with age; undated items get UNDATED_TIME_SCORE, future dates count as now."""
+    now = time.time() if now is None else now
+    stamps = np.fromiter((np.nan if (t := parse_date(d)) is None else t for d in pub_dates),
+                         dtype=np.float64, count=len(pub_dates))
+    age_hours = np.maximum(now - stamps, 0.0) / 3600.0
+    scores = np.exp2(-age_hours / half_life_hours)
+    return np.where(np.isnan(stamps), UNDATED_TIME_SCORE, scores).astype(np.float32)
+
+
+def confidence(s_source, s_sim, s_time=1.0, s_media=MEDIA_SCORE):
+    w_source, w_sim, w_time, w_media = WEIGHTS
+    return w_source * np.asarray(s_source) + w_sim * np.asarray(s_sim) + w_time * np.asarray(s_time) + w_media * s_media
+
+
+def top_k(values, k):
+    """Indices of the k largest values, largest first; only the k winners get sorted."""
+    values = np.asarray(values)
+    k = min(k, len(values))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(values):
+        idx = np.argpartition(-values, k - 1)[:k]
+    else:
+        idx = np.arange(len(values))
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+def score_candidates(sims, links, pub_dates, k=None, now=None, registry=None):
+    """Score every candidate of one claim -> dict of arrays plus "top", the best k indices."""
+    sims = np.asarray(sims, dtype=np.float32)
+    src = source_scores(links, registry)
+    tim = time_scores(pub_dates, now=now)
+    conf = confidence(src, sims, tim).astype(np.float32)
+    return {"sim": sims, "source": src, "time": tim, "conf": conf,
+            "top": top_k(conf, len(conf) if k is None else k)}
@@ -0,0 +1,304 @@
+# telemetry.py
+# Process-wide latency histograms, counters and gauges with Prometheus text
+# export, plus sampled cProfile dumps for slow requests. Standard library only,
+# so the Streamlit app, the offline scripts and the Flask backend (via
+# backend/utils/ai_bridge) all record into the same registry.
+#
+#   with telemetry.timed("sbert_encode"):
+#       emb = model.encode(texts)
+#
+# Every timed() stage feeds verisight_stage_seconds{stage=...}, an in-flight
+# gauge and an error counter. The backend serves render() at /metrics; other
+# processes (the Streamlit app) can call serve_metrics(port).
+import cProfile
+import functools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# seconds; spans sub-millisecond cache hits up to multi-second model loads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("VERISIGHT_PROFILE_SAMPLE", 0))  # fraction of requests profiled
+PROFILE_SLOW_MS = float(os.getenv("VERISIGHT_PROFILE_SLOW_MS", 1000))  # only slower ones are dumped
+PROFILE_DIR = os.getenv("VERISIGHT_PROFILE_DIR", os.path.join("data", "profiles"))
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _fmt(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_text(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, ([*s[0]], s[1], s[2])) for k, s in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, [('le', _fmt(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {count}")
+        return lines
+
+
+_metrics = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name, help_text, labelnames, **kwargs):
+    with _registry_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, help_text, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"metric {name} already registered with a different type or labels")
+        return metric
+
+
+def counter(name, help_text, labelnames=()):
+    return _get_or_create(Counter, name, help_text, labelnames)
+
+
+def gauge(name, help_text, labelnames=()):
+    return _get_or_create(Gauge, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+def add_collector(fn):
+    """Register a scrape-time source of metrics kept elsewhere.
+
+    fn() yields (name, kind, help, samples) where samples maps a tuple of
+    (label, value) pairs to a number.
+    """
+    with _registry_lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+
+
+STAGE_SECONDS = histogram("verisight_stage_seconds", "Wall time of an instrumented stage.", ("stage",))
+STAGE_IN_FLIGHT = gauge("verisight_stage_in_flight", "Stages currently executing.", ("stage",))
+STAGE_ERRORS = counter("verisight_stage_errors_total", "Stages that raised an exception.", ("stage",))
+
+
+@contextmanager
+def timed(stage):
+    """Time a block into verisight_stage_seconds{stage}; tracks in-flight count and errors."""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+
+def traced(stage):
+    """Decorator form of timed()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def observe(stage, seconds):
+    """Record a duration measured elsewhere (e.g. summed over chunks) as a stage."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+# -----------------------
+# Sampled profiling
+# -----------------------
+# cProfile hooks the whole interpreter's profiling machinery, so at most one
+# request is profiled at a time; others run unprofiled rather than waiting.
+_profiling = threading.Lock()
+PROFILES_WRITTEN = counter("verisight_profiles_written_total", "Slow-request cProfile dumps written.", ("name",))
+
+
+class Profile:
+    """Sampled cProfile around one request: start(), then stop(name) writes a .prof if it was slow."""
+
+    def __init__(self, sample_rate=None, slow_ms=None):
+        self.sample_rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.slow_ms = PROFILE_SLOW_MS if slow_ms is None else slow_ms
+        self._prof = None
+        self._t0 = None
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        if self.sample_rate > 0 and random.random() < self.sample_rate and _profiling.acquire(blocking=False):
+            self._prof = cProfile.Profile()
+            try:
+                self._prof.enable()
+            except ValueError:  # another profiler (e.g. a debugger) is already active
+                self._prof = None
+                _profiling.release()
+        return self
+
+    def stop(self, name):
+        """Returns the dump path, or None if not sampled or not slow enough."""
+        if self._prof is None:
+            return None
+        self._prof.disable()
+        _profiling.release()
+        elapsed_ms = (time.perf_counter() - self._t0) * 1000.0
+        if elapsed_ms < self.slow_ms:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        path = os.path.join(PROFILE_DIR, f"{safe}-{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed_ms)}ms-{os.getpid()}-{random.getrandbits(24):06x}.prof")
+        self._prof.dump_stats(path)
+        PROFILES_WRITTEN.inc(name=name)
+        return path
+
+
+@contextmanager
+def profiled(name, sample_rate=None, slow_ms=None):
+    prof = Profile(sample_rate, slow_ms).start()
+    try:
+        yield
+    finally:
+        prof.stop(name)
+
+
+# -----------------------
+# Export
+# -----------------------
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collect in collectors:
+        try:
+            families = list(collect())
+        except Exception:
+            continue  # a broken collector must not take the whole scrape down
+        for name, kind, help_text, samples in families:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, value in samples.items():
+                names = [k for k, _ in labels]
+                lines.append(f"{name}{_label_text(names, [v for _, v in labels])} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Expose /metrics on a background thread (for processes without their own HTTP server)."""
+    global _server
+    with _registry_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
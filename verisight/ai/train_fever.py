@@ -1,7 +1,11 @@
 # train_fever.py
+import hashlib
 import os
-from datasets import load_dataset
+import shutil
+import time
+from datasets import load_dataset, load_from_disk
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer
+from transformers import DataCollatorWithPadding, TrainerCallback
 from preprocess import prepare_fever_split
 import torch
 from transformers import TrainingArguments
@@ -10,6 +14,8 @@ from transformers import TrainingArguments
 MODEL_NAME = os.getenv("MODEL_NAME", "roberta-base")
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "fever-roberta")
 MAX_LEN = int(os.getenv("MAX_LEN", 256))
+TOKENIZED_CACHE_DIR = os.getenv("TOKENIZED_CACHE_DIR", "data/cache/tokenized")
+NUM_WORKERS = int(os.getenv("NUM_WORKERS", 2))
 
 
 def tokenize_batch(batch, tokenizer):
@@ -32,6 +38,59 @@ def tokenize_batch(batch, tokenizer):
 
     return tokenizer(claims, evidences, truncation=True, max_length=MAX_LEN)
 
+def tokenize_cached(ds, tokenizer, split):
+    # keyed by tokenizer, MAX_LEN and the fingerprint of the (filtered) source split
+    key = hashlib.sha256(f"{MODEL_NAME}|{MAX_LEN}|{ds._fingerprint}".encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(TOKENIZED_CACHE_DIR, f"{split}-{key}")
+    if os.path.isdir(path):
+        print(f"Loading cached tokenized {split} split from {path}")
+        return load_from_disk(path)
+
+    tok = ds.map(lambda b: tokenize_batch(b, tokenizer), batched=True, remove_columns=[c for c in ds.column_names if c != "label"])
+    tok = tok.map(lambda b: {"length": [len(ids) for ids in b["input_ids"]]}, batched=True)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tok.save_to_disk(tmp_path)
+    os.replace(tmp_path, path)
+    return load_from_disk(path)
+
+class PadStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.started = time.perf_counter()
+
+class FeverTrainer(Trainer):
+    """Trainer that counts real vs. padded tokens per training step."""
+
+    def __init__(self, *args, pad_stats=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pad_stats = pad_stats
+
+    def training_step(self, model, inputs, *args, **kwargs):
+        if self.pad_stats is not None and "attention_mask" in inputs:
+            mask = inputs["attention_mask"]
+            self.pad_stats.real_tokens += int(mask.sum())
+            self.pad_stats.padded_tokens += mask.numel()
+        return super().training_step(model, inputs, *args, **kwargs)
+
+class PadStatsCallback(TrainerCallback):
+    def __init__(self, stats):
+        self.stats = stats
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self.stats.reset()
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        s = self.stats
+        elapsed = time.perf_counter() - s.started
+        pad_ratio = 1 - s.real_tokens / s.padded_tokens if s.padded_tokens else 0.0
+        print(f"Epoch {state.epoch:.0f}: {s.real_tokens / elapsed:,.0f} tokens/s, "
+              f"pad ratio {pad_ratio:.1%} ({s.padded_tokens - s.real_tokens:,} pad of {s.padded_tokens:,} tokens)")
+
 def main():
     print("Loading tokenizer and model:", MODEL_NAME)
     tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
@@ -46,14 +105,15 @@ def main():
     train_ds = train_ds.filter(lambda x: x["label"] is not None)
     val_ds = val_ds.filter(lambda x: x["label"] is not None)
 
-    # Tokenize
+    # Tokenize (cached on disk); the "length" column feeds group_by_length and is
+    # dropped from the batches by remove_unused_columns
     print("Tokenizing datasets")
-    train_tok = train_ds.map(lambda b: tokenize_batch(b, tokenizer), batched=True, remove_columns=train_ds.column_names)
-    val_tok = val_ds.map(lambda b: tokenize_batch(b, tokenizer), batched=True, remove_columns=val_ds.column_names)
-
-    train_tok.set_format(type="torch")
-    val_tok.set_format(type="torch")
+    train_tok = tokenize_cached(train_ds, tokenizer, "train")
+    val_tok = tokenize_cached(val_ds, tokenizer, "validation")
 
+    # pad each batch only to its own longest example
+    collator = DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8 if torch.cuda.is_available() else None)
+    pad_stats = PadStats()
 
     training_args = TrainingArguments(
         output_dir="./fever-roberta-final",
@@ -69,6 +129,9 @@ def main():
         logging_dir="./logs",
         logging_strategy="epoch",          # Log metrics every epoch
         save_total_limit=2,                # Keep last 2 checkpoints
+        dataloader_num_workers=NUM_WORKERS,
+        group_by_length=True,              # batch similar-length examples so padding stays small
+        length_column_name="length",
     )
 
     def compute_metrics(eval_pred):
@@ -78,13 +141,16 @@ def main():
         preds = logits.argmax(axis=-1)
         return metric_acc.compute(predictions=preds, references=labels)
 
-    trainer = Trainer(
+    trainer = FeverTrainer(
         model=model,
         args=training_args,
         train_dataset=train_tok,
         eval_dataset=val_tok,
         tokenizer=tokenizer,
-        compute_metrics=compute_metrics
+        data_collator=collator,
+        compute_metrics=compute_metrics,
+        callbacks=[PadStatsCallback(pad_stats)],
+        pad_stats=pad_stats,
     )
 
     trainer.train()
@@ -7,3 +7,6 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret")
 # Database path
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATABASE = os.path.join(BASE_DIR, "db", "verisight.db")
+
+# Largest accepted upload; bigger requests are rejected before the body is read
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 200)) * 1024 * 1024
@@ -1,16 +1,60 @@
 from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
+from backend import MAX_UPLOAD_BYTES
+from backend.db.database import init_db
 from backend.routes.auth_routes import auth_bp
 from backend.routes.verify_routes import verify_bp
+from backend.routes.claim_routes import claim_bp, get_pipeline
+from backend.routes.history_routes import history_bp
+from backend.utils import metrics
+from backend.utils.job_queue import job_queue
+from backend.utils.phash import near_duplicates
+from backend.utils.verdict_cache import verdicts
+import os
+
+def queue_and_cache_metrics():
+    # counters the job queue, verdict cache and near-duplicate index already keep
+    jobs = job_queue.stats()
+    yield ("verisight_job_queue_depth", "gauge", "Jobs waiting to run.", {(): jobs["queue_depth"]})
+    yield ("verisight_jobs_in_flight", "gauge", "Jobs running in this process's pool.", {(): jobs["in_flight"]})
+    yield ("verisight_jobs_total", "counter", "Job queue events in this process.",
+           {(("outcome", k),): jobs[k]
+            for k in ("enqueued", "coalesced", "completed", "failed", "retried", "errored", "superseded")})
+    cache = verdicts.stats()
+    yield ("verisight_verdict_lookups_total", "counter", "Media verdict lookups by outcome.",
+           {(("outcome", k),): cache[k] for k in ("hits", "near_hits", "misses", "stale")})
+    near = near_duplicates.stats()
+    yield ("verisight_phash_indexed", "gauge", "Perceptual hashes in the near-duplicate index.",
+           {(): near["indexed_hashes"] or 0})
 
 def create_app():
+    init_db()  # create the database or apply pending migrations
     app = Flask(__name__)
     app.config["JWT_SECRET_KEY"] = "supersecretkey123"  # Change in production
     JWTManager(app)
+    # reject oversized uploads from Content-Length alone (64 KiB slack for multipart headers)
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES + 64 * 1024
+
+    @app.errorhandler(413)
+    def too_large(e):
+        return jsonify({"error": f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"}), 413
 
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(verify_bp)
+    app.register_blueprint(claim_bp)
+    app.register_blueprint(history_bp)
+
+    # per-request latency, sampled cProfile dumps (VERISIGHT_PROFILE_SAMPLE) and GET /metrics
+    metrics.init_app(app, collectors=[queue_and_cache_metrics])
+
+    if job_queue.max_workers > 0:
+        # VERIFY_WORKERS=0 leaves detection to a separate `python -m backend.utils.job_queue` tier
+        job_queue.start()
+
+    if os.getenv("VERISIGHT_WARMUP") == "1":
+        # load spaCy/SBERT in the background so the first claim request is fast
+        get_pipeline().models.warm_up(background=True)
 
     @app.route("/", methods=["GET"])
     def index():
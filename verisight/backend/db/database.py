@@ -1,23 +1,115 @@
 import sqlite3
 import os
+import re
+import threading
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "verisight.db")
-SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema.sql")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+# NORMAL is durable across application crashes in WAL mode; only an OS crash can lose the last commits
+SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+
+_local = threading.local()
+
+
+def connect(path=None):
+    """Open a tuned connection: WAL journal, busy timeout instead of instant "database is locked"."""
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000.0)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
     return conn
 
-def init_db():
-    """Initialize database with users and verifications tables."""
-    if not os.path.exists(DB_PATH):
-        conn = get_db()
-        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-            conn.executescript(f.read())
-        conn.commit()
+
+def get_db():
+    """Return this thread's connection, opening it on first use.
+
+    Connections are reused for the life of the thread, so callers must not close
+    them; wrap writes in `with conn:` so they commit, or roll back on error.
+    """
+    key = (os.getpid(), DB_PATH)  # a forked child or a swapped DB_PATH gets a fresh connection
+    if getattr(_local, "key", None) != key:
+        _local.conn = connect()
+        _local.key = key
+    return _local.conn
+
+
+def close_db():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
         conn.close()
+        _local.conn = _local.key = None
+
+
+def list_migrations():
+    """(version, path) for every migrations/NNN_name.sql, in order."""
+    found = []
+    for name in os.listdir(MIGRATIONS_DIR):
+        m = re.match(r"(\d+)_.*\.sql$", name)
+        if m:
+            found.append((int(m.group(1)), os.path.join(MIGRATIONS_DIR, name)))
+    return sorted(found)
+
+
+def split_statements(sql):
+    stmt = ""
+    for line in sql.splitlines(keepends=True):
+        stmt += line
+        if sqlite3.complete_statement(stmt):
+            yield stmt.strip()
+            stmt = ""
+    if stmt.strip():
+        yield stmt.strip()
+
+
+def migrate(path=None):
+    """Apply pending migrations; the schema version lives in PRAGMA user_version.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction and re-checks the
+    version once it holds the write lock, so processes starting together apply it once.
+    """
+    conn = connect(path)
+    conn.isolation_level = None  # transactions are managed explicitly below
+    applied = []
+    try:
+        for version, mig_path in list_migrations():
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            with open(mig_path, "r", encoding="utf-8-sig") as f:
+                sql = f.read()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    conn.execute("ROLLBACK")
+                    continue
+                for stmt in split_statements(sql):
+                    try:
+                        conn.execute(stmt)
+                    except sqlite3.OperationalError as e:
+                        # databases set up before versioning may already have the column
+                        if "duplicate column name" not in str(e):
+                            raise
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(os.path.basename(mig_path))
+    finally:
+        conn.close()
+    return applied
+
+
+def init_db():
+    """Create the database or bring an existing one up to the latest migration."""
+    created = not os.path.exists(DB_PATH)
+    applied = migrate()
+    if created:
         print("[DB] Database created and schema loaded.")
+    elif applied:
+        print(f"[DB] Applied migrations: {', '.join(applied)}.")
     else:
         print("[DB] Database already exists.")
 
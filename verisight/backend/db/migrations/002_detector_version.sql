@@ -0,0 +1,2 @@
+-- Verdicts are tagged with the detector that produced them (backend/utils/verdict_cache.py)
+ALTER TABLE verifications ADD COLUMN detector_version TEXT;
@@ -0,0 +1,7 @@
+-- Perceptual hashes of verified uploads (one row per image, one per sampled video keyframe)
+CREATE TABLE IF NOT EXISTS phashes (
+    hash_value TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    phash INTEGER NOT NULL,
+    PRIMARY KEY (hash_value, frame)
+);
@@ -0,0 +1,29 @@
+-- verifications becomes a per-request log: one row each time a user verifies
+-- media or a claim. Media verdicts are still looked up by hash (latest row wins).
+-- Rows written while a job runs hold result 'pending' and its job_id until it finishes.
+CREATE TABLE verifications_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users (id),
+    kind TEXT NOT NULL DEFAULT 'media',
+    hash_value TEXT NOT NULL,
+    data TEXT NOT NULL,
+    result TEXT NOT NULL,
+    confidence REAL,
+    detector_version TEXT,
+    job_id TEXT,
+    created_at REAL NOT NULL
+);
+
+INSERT INTO verifications_new (id, hash_value, data, result, detector_version, created_at)
+SELECT id, hash_value, data, result, detector_version, CAST(strftime('%s', 'now') AS REAL) FROM verifications;
+
+DROP TABLE verifications;
+ALTER TABLE verifications_new RENAME TO verifications;
+
+-- verdict lookup by content hash, newest first
+CREATE INDEX idx_verifications_hash ON verifications (hash_value, id);
+-- /api/history: the keyset (created_at, id) follows the user (and result) prefix,
+-- so a page is a single index range scan however deep the cursor is
+CREATE INDEX idx_verifications_user_time ON verifications (user_id, created_at, id);
+CREATE INDEX idx_verifications_user_result_time ON verifications (user_id, result, created_at, id);
+CREATE INDEX idx_verifications_job ON verifications (job_id) WHERE job_id IS NOT NULL;
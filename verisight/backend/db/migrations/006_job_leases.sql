@@ -0,0 +1,5 @@
+-- Running jobs carry the claiming process and a lease it keeps renewing;
+-- only jobs whose lease has lapsed are re-queued (backend/utils/job_queue.py)
+ALTER TABLE jobs ADD COLUMN owner TEXT;
+ALTER TABLE jobs ADD COLUMN lease_until REAL;
+CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs (status, lease_until);
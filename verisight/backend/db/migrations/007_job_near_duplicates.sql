@@ -0,0 +1,4 @@
+-- Jobs answered from a near-duplicate's verdict instead of running detection
+-- record which stored file they matched (backend/utils/job_queue.py)
+ALTER TABLE jobs ADD COLUMN near_duplicate_of TEXT;
+ALTER TABLE jobs ADD COLUMN hamming_distance INTEGER;
@@ -0,0 +1,13 @@
+-- At most one queued/running job per content hash, so enqueue() in several
+-- processes cannot start duplicate detections (backend/utils/job_queue.py).
+-- Duplicates left by older versions are folded into the oldest active job first.
+UPDATE verifications SET job_id = (
+    SELECT k.id FROM jobs d JOIN jobs k ON k.hash_value = d.hash_value AND k.status IN ('queued', 'running')
+    WHERE d.id = verifications.job_id ORDER BY k.created_at, k.id LIMIT 1
+)
+WHERE job_id IN (SELECT id FROM jobs WHERE status IN ('queued', 'running'));
+DELETE FROM jobs WHERE status IN ('queued', 'running') AND id != (
+    SELECT k.id FROM jobs k WHERE k.hash_value = jobs.hash_value AND k.status IN ('queued', 'running')
+    ORDER BY k.created_at, k.id LIMIT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_hash ON jobs (hash_value) WHERE status IN ('queued', 'running');
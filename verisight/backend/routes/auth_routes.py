@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from backend.db.database import get_db
 import hashlib
 from flask_jwt_extended import create_access_token
+from backend.utils.metrics import timed
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -20,13 +21,11 @@ def register():
 
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
-            (username, email, password_hash)
-        )
-        conn.commit()
-        conn.close()
+        with timed("db_user_insert"), conn:
+            conn.execute(
+                "INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
+                (username, email, password_hash)
+            )
         return jsonify({"message": "User registered successfully"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -42,13 +41,11 @@ def login():
 
     try:
         conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM users WHERE username=? AND password=?", 
-            (username, password_hash)
-        )
-        user = cursor.fetchone()
-        conn.close()
+        with timed("db_user_lookup"):
+            user = conn.execute(
+                "SELECT * FROM users WHERE username=? AND password=?", 
+                (username, password_hash)
+            ).fetchone()
         if user:
             token = create_access_token(identity=username)
             return jsonify({"message": "Login successful", "token": token}), 200
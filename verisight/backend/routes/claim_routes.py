@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend.utils.ai_bridge import ensure_ai_path
+from backend.utils.history import record_claims, user_id_for
+from backend.utils.metrics import timed
+
+claim_bp = Blueprint("claims", __name__)
+
+MAX_CLAIMS_PER_REQUEST = 64
+
+def get_pipeline():
+    # imported lazily so the backend starts without loading the NLP stack
+    ensure_ai_path()
+    import pipeline
+    return pipeline
+
+@claim_bp.route("/api/claims/verify", methods=["POST"])
+@jwt_required()  # each claim fans out to the news feeds and the models, so like /api/verify it needs a token
+def verify_claims():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or ("claim" not in data and "claims" not in data):
+        return jsonify({"error": "Provide 'claim' or 'claims'"}), 400
+
+    single = "claims" not in data
+    claims = [data["claim"]] if single else data["claims"]
+    if not isinstance(claims, list) or not claims or not all(isinstance(c, str) and c.strip() for c in claims):
+        return jsonify({"error": "Claims must be non-empty strings"}), 400
+    if len(claims) > MAX_CLAIMS_PER_REQUEST:
+        return jsonify({"error": f"At most {MAX_CLAIMS_PER_REQUEST} claims per request"}), 413
+
+    try:
+        results, timings = get_pipeline().verify_claims(claims)
+    except Exception as e:
+        return jsonify({"error": f"Verification failed: {str(e)}"}), 500
+
+    # the claims also go into the caller's /api/history
+    user_id = user_id_for(get_jwt_identity())
+    if user_id is not None:
+        with timed("db_history_insert"):
+            record_claims(user_id, results)
+
+    if single:
+        return jsonify({"result": results[0], "timings_ms": timings}), 200
+    return jsonify({"results": results, "timings_ms": timings}), 200
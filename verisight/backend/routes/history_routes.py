@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend.utils.history import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page, parse_time, user_id_for
+from backend.utils.metrics import timed
+
+history_bp = Blueprint("history", __name__)
+
+@history_bp.route("/api/history", methods=["GET"])
+@jwt_required()
+def history():
+    user_id = user_id_for(get_jwt_identity())
+    if user_id is None:
+        return jsonify({"error": "Unknown user"}), 404
+
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    try:
+        since = parse_time(request.args["since"]) if request.args.get("since") else None
+        until = parse_time(request.args["until"]) if request.args.get("until") else None
+        with timed("db_history_page"):
+            items, next_cursor = page(
+                user_id,
+                cursor=request.args.get("cursor"),
+                limit=limit,
+                result=request.args.get("result"),
+                kind=request.args.get("kind"),
+                since=since,
+                until=until
+            )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or date"}), 400
+
+    return jsonify({"items": items, "next_cursor": next_cursor}), 200
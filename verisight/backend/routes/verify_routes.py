@@ -1,52 +1,108 @@
 from flask import Blueprint, request, jsonify
-from backend.db.database import get_db
-import hashlib
 import os
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend import MAX_UPLOAD_BYTES
+from backend.utils.upload_utils import UploadTooLarge, save_upload_stream
+from backend.utils.history import user_id_for
+from backend.utils.job_queue import job_queue
+from backend.utils.phash import near_duplicates
+from backend.utils.verdict_cache import verdicts
 
 verify_bp = Blueprint("verify", __name__)
 
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "../../data/uploads")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def hash_file(file_bytes: bytes) -> str:
-    return hashlib.sha256(file_bytes).hexdigest()
-
-def deepfake_check(file_path: str) -> str:
-    """Placeholder for deepfake detection."""
-    return "Real"  # Replace with real model inference
+# Upper bound for ?wait= long-polls so a client cannot pin a web worker indefinitely
+MAX_WAIT_SECONDS = 30.0
 
 @verify_bp.route("/api/verify", methods=["POST"])
 @jwt_required()
 def verify_file():
+    user_id = user_id_for(get_jwt_identity())
+
     if "file" not in request.files:
         return jsonify({"error": "No file provided"}), 400
 
     file = request.files["file"]
-    file_bytes = file.read()
-    file_hash = hash_file(file_bytes)
 
-    # Save file
-    file_path = os.path.join(UPLOAD_FOLDER, f"{file_hash}_{file.filename}")
-    with open(file_path, "wb") as f:
-        f.write(file_bytes)
+    # Stream to disk in chunks, hashing as we go, then move into data/uploads/ab/cd/<sha256><ext>
+    try:
+        file_hash, file_path, _ = save_upload_stream(file.stream, UPLOAD_FOLDER, file.filename, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
 
-    result = deepfake_check(file_path)
+    # Known content returns its stored verdict straight away
+    try:
+        row = verdicts.lookup(file_hash)
+    except Exception as e:
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+    if row is not None:
+        verdicts.record_hit()
+        verdicts.store(file_hash, file.filename, row["result"], user_id=user_id)
+        return jsonify({
+            "hash": file_hash,
+            "filename": file.filename,
+            "verification_result": row["result"],
+            "cached": True,
+            "detector_version": verdicts.detector_version
+        }), 200
 
+    # Everything else runs in the worker tier: the job reuses a near-duplicate's
+    # verdict for recompressed/resized copies or runs detection. An upload of
+    # content that is already queued or running joins that job instead of adding another
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO verifications (hash_value, data, result) VALUES (?, ?, ?)",
-            (file_hash, file.filename, result)
-        )
-        conn.commit()
-        conn.close()
+        # the user's history entry stays pending until the job fills it in
+        job_id = job_queue.enqueue(file_hash, file_path, file.filename, user_id=user_id)
+        job = job_queue.get(job_id)
     except Exception as e:
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
-    return jsonify({
-        "hash": file_hash,
-        "filename": file.filename,
-        "verification_result": result
-    }), 200
+    wait = request.args.get("wait", type=float)
+    if wait:
+        job = job_queue.wait(job_id, min(wait, MAX_WAIT_SECONDS))
+    # a joined job may have been queued by someone else; echo this caller's own filename
+    return job_response(job, filename=file.filename)
+
+def job_response(job, filename=None):
+    body = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "hash": job["hash_value"],
+        "filename": filename or job["filename"],
+        "attempts": job["attempts"],
+        "status_url": f"/api/jobs/{job['id']}"
+    }
+    if job["status"] == "done":
+        body["verification_result"] = job["result"]
+        body["cached"] = job.get("near_duplicate_of") is not None
+        if body["cached"]:
+            body["near_duplicate_of"] = job["near_duplicate_of"]
+            body["hamming_distance"] = job["hamming_distance"]
+        body["detector_version"] = verdicts.detector_version
+        return jsonify(body), 200
+    if job["status"] == "failed":
+        body["error"] = job["error"]
+        return jsonify(body), 500
+    return jsonify(body), 202
+
+@verify_bp.route("/api/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def job_status(job_id):
+    wait = request.args.get("wait", type=float)
+    job = job_queue.wait(job_id, min(wait, MAX_WAIT_SECONDS)) if wait else job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return job_response(job)
+
+@verify_bp.route("/api/jobs/stats", methods=["GET"])
+@jwt_required()
+def job_stats():
+    return jsonify(job_queue.stats()), 200
+
+@verify_bp.route("/api/verify/stats", methods=["GET"])
+@jwt_required()
+def verify_stats():
+    stats = verdicts.stats()
+    stats["near_duplicates"] = near_duplicates.stats()
+    return jsonify(stats), 200
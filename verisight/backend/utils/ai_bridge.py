@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The ai/ scripts import each other as top-level modules (they are run from
+# inside ai/), so the backend puts that directory on sys.path before importing them.
+AI_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "ai"))
+
+
+def ensure_ai_path():
+    if AI_DIR not in sys.path:
+        sys.path.insert(0, AI_DIR)
@@ -0,0 +1,3 @@
+def deepfake_check(file_path: str) -> str:
+    """Placeholder for deepfake detection."""
+    return "Real"  # Replace with real model inference
@@ -0,0 +1,86 @@
+import base64
+import hashlib
+import time
+from datetime import datetime, timezone
+from backend.db.database import get_db
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+HISTORY_COLUMNS = "id, kind, hash_value, data, result, confidence, detector_version, job_id, created_at"
+
+
+def user_id_for(username):
+    """JWT identities are usernames; history rows reference users.id."""
+    if not username:
+        return None
+    row = get_db().execute("SELECT id FROM users WHERE username=?", (username,)).fetchone()
+    return row["id"] if row else None
+
+
+def record_claims(user_id, results):
+    """Add one history row per verified claim (pipeline.verify_claims output)."""
+    now = time.time()
+    conn = get_db()
+    with conn:
+        conn.executemany(
+            "INSERT INTO verifications (user_id, kind, hash_value, data, result, confidence, created_at) "
+            "VALUES (?, 'claim', ?, ?, ?, ?, ?)",
+            [(user_id, hashlib.sha256(r["normalized"].encode("utf-8")).hexdigest(), r["claim"], r["badge"],
+              r["top_conf"], now) for r in results]
+        )
+
+
+def encode_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(f"{created_at!r}:{row_id}".encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+    return float(created_at), int(row_id)
+
+
+def parse_time(value):
+    """Epoch seconds or an ISO-8601 date/datetime (UTC if no offset) -> epoch seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+
+def page(user_id, cursor=None, limit=DEFAULT_PAGE_SIZE, result=None, kind=None, since=None, until=None):
+    """One page of a user's history, newest first -> (rows, next_cursor).
+
+    Keyset pagination: the cursor is the (created_at, id) of the last row served
+    and the next page starts strictly after it, so every page costs one index
+    seek plus `limit` rows, unlike OFFSET which re-reads everything before it.
+    """
+    where = ["user_id = ?"]
+    params = [user_id]
+    if result:
+        where.append("result = ?")
+        params.append(result)
+    if kind:
+        where.append("kind = ?")
+        params.append(kind)
+    if since is not None:
+        where.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("created_at < ?")
+        params.append(until)
+    if cursor:
+        where.append("(created_at, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+
+    rows = get_db().execute(
+        f"SELECT {HISTORY_COLUMNS} FROM verifications WHERE {' AND '.join(where)} "
+        "ORDER BY created_at DESC, id DESC LIMIT ?",
+        params + [limit + 1]
+    ).fetchall()
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"]) if len(rows) > limit else None
+    return items, next_cursor
@@ -0,0 +1,325 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from backend.db.database import get_db
+from backend.utils.metrics import observe, timed
+from backend.utils.detector import deepfake_check
+from backend.utils.phash import near_duplicates, perceptual_hashes
+from backend.utils.verdict_cache import FAILED, PENDING, verdicts
+
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", 2))
+MAX_ATTEMPTS = int(os.getenv("VERIFY_MAX_ATTEMPTS", 3))
+RETRY_BACKOFF = float(os.getenv("VERIFY_RETRY_BACKOFF", 2.0))  # seconds, doubled per attempt
+LEASE_SECONDS = float(os.getenv("VERIFY_LEASE_SECONDS", 60.0))  # renewed every third of this while running
+
+TERMINAL = ("done", "failed")
+
+
+def run_detection(file_path: str) -> str:
+    # executed in a worker process
+    return deepfake_check(file_path)
+
+
+class JobQueue:
+    """SQLite-backed verification queue drained by a process pool.
+
+    A job first hashes its file perceptually in the pool (decoding video
+    keyframes is too slow for the web request); a recompressed or resized
+    copy of media that already has a verdict reuses it, anything else goes
+    on to detection.
+
+    Jobs survive restarts. Several processes may drain the same table: a job
+    is claimed with a conditional UPDATE that records the owner and a lease,
+    and the owner renews the lease while the job runs. Only jobs whose lease
+    has lapsed (their process died) are put back to "queued", so a second
+    process starting up never steals work that is still running elsewhere.
+    """
+
+    def __init__(self, max_workers=VERIFY_WORKERS, max_attempts=MAX_ATTEMPTS, poll_interval=0.5):
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._dispatcher = None
+        self._running = 0
+        self._in_flight = set()  # ids of jobs this process holds leases on
+        self.owner = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._counts = {"enqueued": 0, "coalesced": 0, "completed": 0, "failed": 0, "retried": 0, "errored": 0,
+                        "superseded": 0}
+        self._wait_s = deque(maxlen=1000)
+        self._run_s = deque(maxlen=1000)
+
+    # -- producer side -------------------------------------------------------
+
+    def find_active(self, file_hash):
+        conn = get_db()
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE hash_value=? AND status IN ('queued', 'running') ORDER BY created_at LIMIT 1",
+            (file_hash,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def enqueue(self, file_hash, file_path, filename, user_id=None):
+        """Queue a verification, or return the job already queued/running for this content.
+
+        The lookup, the new job and the user's pending verifications row are written
+        in one BEGIN IMMEDIATE transaction: no other process can queue the same
+        content or finish the joined job in between (a partial unique index backs
+        this up), so the pending row always gets filled in.
+        """
+        conn = get_db()
+        with timed("db_job_enqueue"), conn:
+            conn.execute("BEGIN IMMEDIATE")
+            active = self.find_active(file_hash)  # same connection, inside the transaction
+            job_id = active["id"] if active else uuid.uuid4().hex
+            if active is None:
+                conn.execute(
+                    "INSERT INTO jobs (id, hash_value, file_path, filename, status, attempts, created_at, not_before) "
+                    "VALUES (?, ?, ?, ?, 'queued', 0, ?, 0)",
+                    (job_id, file_hash, file_path, filename, time.time())
+                )
+            verdicts.store(file_hash, filename, PENDING, user_id=user_id, job_id=job_id, conn=conn)
+        with self._lock:
+            self._counts["coalesced" if active else "enqueued"] += 1
+        if active is None:
+            self._wakeup.set()
+            return job_id
+        # the job's completion fills in every pending row committed before it; re-check
+        # anyway so that no path can leave this caller's history entry pending
+        job = self.get(job_id)
+        if job is not None and job["status"] in TERMINAL:
+            verdicts.complete_job(job_id, file_hash, filename, job["result"] or FAILED)
+        return job_id
+
+    def get(self, job_id):
+        conn = get_db()
+        row = conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def wait(self, job_id, timeout):
+        """Long-poll: return the job once it is done/failed or when timeout expires."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in TERMINAL or remaining <= 0:
+                return job
+            with self._changed:
+                # woken by local completions; the cap catches jobs finished by other processes
+                self._changed.wait(min(remaining, 1.0))
+
+    # -- worker side ---------------------------------------------------------
+
+    def start(self):
+        if self._dispatcher is not None:
+            return
+        # set here, not in __init__, so a forked child (e.g. the debug reloader) gets its own identity
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.requeue_orphans()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="verify-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def requeue_orphans(self):
+        """Put back running jobs whose owner stopped renewing their lease."""
+        conn = get_db()
+        with conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status='queued', started_at=NULL, owner=NULL, lease_until=NULL "
+                "WHERE status='running' AND (lease_until IS NULL OR lease_until < ?)",
+                (time.time(),)
+            )
+            if cur.rowcount:
+                print(f"[Jobs] Re-queued {cur.rowcount} jobs whose worker stopped renewing its lease.")
+
+    def _renew_leases(self):
+        with self._lock:
+            ids = list(self._in_flight)
+        if not ids:
+            return
+        conn = get_db()
+        with conn:
+            conn.execute(
+                f"UPDATE jobs SET lease_until=? WHERE owner=? AND status='running' AND id IN ({','.join('?' * len(ids))})",
+                [time.time() + LEASE_SECONDS, self.owner, *ids]
+            )
+
+    def _claim(self):
+        conn = get_db()
+        with conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status='queued' AND not_before <= ? ORDER BY created_at LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+            if row is None:
+                return None
+            started = time.time()
+            cur = conn.execute(
+                "UPDATE jobs SET status='running', started_at=?, attempts=attempts+1, owner=?, lease_until=? "
+                "WHERE id=? AND status='queued'",
+                (started, self.owner, started + LEASE_SECONDS, row["id"])
+            )
+            if cur.rowcount != 1:
+                return None  # another worker took it
+            job = dict(row)
+            job["attempts"] += 1
+            job["started_at"] = started
+            return job
+
+    def _dispatch_loop(self):
+        next_renewal = next_sweep = time.monotonic()
+        failures = 0
+        while True:
+            try:
+                now = time.monotonic()
+                if now >= next_renewal:
+                    self._renew_leases()
+                    next_renewal = now + LEASE_SECONDS / 3
+                if now >= next_sweep:
+                    self.requeue_orphans()  # jobs of workers that died since we started
+                    next_sweep = now + LEASE_SECONDS
+                with self._lock:
+                    free = self._running < self.max_workers
+                job = self._claim() if free else None
+                failures = 0
+            except sqlite3.Error as e:
+                # e.g. "database is locked" under load: back off and keep the dispatcher alive
+                failures += 1
+                delay = min(self.poll_interval * 2 ** failures, 30.0)
+                print(f"[Jobs] Dispatcher database error ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            with self._lock:
+                self._running += 1
+                self._in_flight.add(job["id"])
+            try:
+                future = self._executor.submit(perceptual_hashes, job["file_path"], job["filename"])
+            except RuntimeError:
+                # pool shut down at interpreter exit; the claimed job's lease lapses and it is re-queued
+                return
+            future.add_done_callback(lambda f, job=job: self._after_hashes(job, f))
+
+    def _after_hashes(self, job, future):
+        """Reuse the verdict of a near-duplicate if there is one, otherwise run detection."""
+        match = original = None
+        try:
+            phashes = future.result() if future.exception() is None else []
+            with timed("phash_lookup"):
+                match = near_duplicates.find(phashes)
+            original = verdicts.lookup(match[0]) if match else None
+            near_duplicates.add(job["hash_value"], phashes)
+        except Exception as e:
+            print(f"[Jobs] Near-duplicate check for job {job['id']} failed: {e!r}")
+        if original is not None:
+            near_duplicates.record_hit()
+            verdicts.record_hit(near=True)
+            verdict = Future()
+            verdict.set_result(original["result"])
+            self._finish(job, verdict, near_duplicate=(original["hash_value"], match[1]), reused=True)
+            return
+        verdicts.record_miss()
+        try:
+            detection = self._executor.submit(run_detection, job["file_path"])
+        except RuntimeError:
+            return  # shutting down; as above, the lease lapses and the job is re-queued
+        detection.add_done_callback(lambda f: self._finish(job, f))
+
+    def _finish(self, job, future, near_duplicate=(None, None), reused=False):
+        now = time.time()
+        outcome = "errored"
+        try:
+            error = future.exception()
+            conn = get_db()
+            with conn:
+                # the owner check keeps a worker whose lease lapsed from overwriting the job's re-run
+                if error is None:
+                    result = future.result()
+                    cur = conn.execute(
+                        "UPDATE jobs SET status='done', result=?, error=NULL, finished_at=?, lease_until=NULL, "
+                        "near_duplicate_of=?, hamming_distance=? WHERE id=? AND owner=?",
+                        (result, now, *near_duplicate, job["id"], self.owner))
+                    outcome = "completed"
+                elif job["attempts"] < self.max_attempts:
+                    cur = conn.execute(
+                        "UPDATE jobs SET status='queued', error=?, not_before=?, owner=NULL, lease_until=NULL "
+                        "WHERE id=? AND owner=?",
+                        (str(error), now + RETRY_BACKOFF * 2 ** (job["attempts"] - 1), job["id"], self.owner))
+                    outcome = "retried"
+                else:
+                    result = FAILED
+                    cur = conn.execute(
+                        "UPDATE jobs SET status='failed', error=?, finished_at=?, lease_until=NULL WHERE id=? AND owner=?",
+                        (str(error), now, job["id"], self.owner))
+                    outcome = "failed"
+                if cur.rowcount == 0:
+                    outcome = "superseded"  # another worker took the job over; this run is discarded
+                elif outcome != "retried":
+                    verdicts.complete_job(job["id"], job["hash_value"], job["filename"], result)
+        except Exception as e:
+            # the job stays "running" without lease renewals, so it is re-queued once the lease lapses
+            print(f"[Jobs] Could not record the outcome of job {job['id']}: {e!r}")
+        finally:
+            with self._changed:
+                self._running -= 1
+                self._in_flight.discard(job["id"])
+                self._counts[outcome] += 1
+                if outcome in ("completed", "failed"):
+                    self._wait_s.append(job["started_at"] - job["created_at"])
+                    self._run_s.append(now - job["started_at"])
+                self._changed.notify_all()
+            self._wakeup.set()
+        if outcome in ("completed", "failed"):
+            observe("job_queue_wait", job["started_at"] - job["created_at"])
+            # a reused near-duplicate verdict never ran the detector; keep it out of detect_run
+            observe("near_duplicate_reuse" if reused else "detect_run", now - job["started_at"])
+
+    # -- metrics -------------------------------------------------------------
+
+    def stats(self):
+        conn = get_db()
+        depth = {row["status"]: row["n"] for row in
+                 conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+        with self._lock:
+            s = dict(self._counts)
+            s["in_flight"] = self._running
+            wait_s, run_s = sorted(self._wait_s), sorted(self._run_s)
+        s["queue_depth"] = depth.get("queued", 0)
+        s["by_status"] = depth
+        s["max_workers"] = self.max_workers
+        s["queue_wait_ms"] = _percentiles(wait_s)
+        s["run_ms"] = _percentiles(run_s)
+        return s
+
+
+def _percentiles(sorted_s):
+    if not sorted_s:
+        return {"p50": None, "p95": None}
+    pick = lambda q: round(1000.0 * sorted_s[min(len(sorted_s) - 1, int(q * len(sorted_s)))], 2)
+    return {"p50": pick(0.50), "p95": pick(0.95)}
+
+
+job_queue = JobQueue()
+
+if __name__ == "__main__":
+    # Stand-alone worker tier: drains the shared jobs table without serving HTTP.
+    from backend.db.database import init_db
+    init_db()
+    job_queue.start()
+    print(f"[Jobs] Worker tier running with {job_queue.max_workers} processes.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,44 @@
+import time
+from flask import Response, g, request
+from backend.utils.ai_bridge import ensure_ai_path
+
+# The registry lives in ai/telemetry.py so claim-pipeline stages run inside the
+# backend land in the same /metrics output as the HTTP and database timings.
+ensure_ai_path()
+import telemetry  # noqa: E402
+from telemetry import observe, timed  # noqa: E402,F401  (re-exported for backend modules)
+
+HTTP_SECONDS = telemetry.histogram("verisight_http_request_seconds", "Flask request latency.",
+                                   ("method", "endpoint", "status"))
+HTTP_IN_FLIGHT = telemetry.gauge("verisight_http_requests_in_flight", "Requests currently being handled.",
+                                 ("endpoint",))
+
+
+def init_app(app, collectors=()):
+    """Time every request, sample slow ones with cProfile, and serve GET /metrics."""
+    for collect in collectors:
+        telemetry.add_collector(collect)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_endpoint = request.endpoint or "unmatched"
+        g.metrics_t0 = time.perf_counter()
+        g.metrics_profile = telemetry.Profile().start()
+        HTTP_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+    @app.after_request
+    def record_latency(response):
+        if "metrics_t0" in g:
+            HTTP_SECONDS.observe(time.perf_counter() - g.metrics_t0, method=request.method,
+                                 endpoint=g.metrics_endpoint, status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def finish(exc):
+        if "metrics_t0" in g:
+            HTTP_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+            g.metrics_profile.stop(f"{request.method}-{g.metrics_endpoint}")
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(telemetry.render(), content_type=telemetry.CONTENT_TYPE)
@@ -0,0 +1,196 @@
+import os
+import threading
+from collections import defaultdict
+import numpy as np
+from backend.db.database import get_db
+
+# Largest Hamming distance (out of 64 bits) at which two dHashes count as the same picture.
+# Recompression and resizing typically stay within 0-4 bits; unrelated images sit near 32.
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", 4))
+KEYFRAME_INTERVAL = float(os.getenv("KEYFRAME_INTERVAL", 2.0))  # seconds between sampled video frames
+MAX_KEYFRAMES = int(os.getenv("MAX_KEYFRAMES", 16))
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+HASH_BITS = 64
+
+
+def dhash_pixels(gray) -> int:
+    """64-bit difference hash of a 8x9 grayscale array: one bit per horizontal gradient sign."""
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def image_dhash(path: str) -> int:
+    from PIL import Image
+    with Image.open(path) as img:
+        return dhash_pixels(np.asarray(img.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16))
+
+
+def video_dhashes(path: str, interval: float = KEYFRAME_INTERVAL, max_frames: int = MAX_KEYFRAMES) -> list:
+    """dHashes of frames sampled every `interval` seconds (OpenCV is optional)."""
+    try:
+        import cv2
+    except ImportError:
+        return []
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        step = max(1, int(round(fps * interval)))
+        positions = range(0, total, step) if total else range(0, step * max_frames, step)
+        hashes = []
+        for pos in list(positions)[:max_frames]:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+            ok, frame = cap.read()
+            if not ok:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            hashes.append(dhash_pixels(cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)))
+        return hashes
+    finally:
+        cap.release()
+
+
+def perceptual_hashes(path: str, filename: str = "") -> list:
+    """One hash for an image, one per sampled keyframe for a video, [] if the file cannot be decoded."""
+    ext = os.path.splitext(filename or path)[1].lower()
+    try:
+        if ext in VIDEO_EXTENSIONS:
+            return video_dhashes(path)
+        return [image_dhash(path)]
+    except Exception:
+        return []
+
+
+def _to_sqlite(h: int) -> int:
+    # SQLite integers are signed 64-bit
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def _from_sqlite(v: int) -> int:
+    return v + (1 << 64) if v < 0 else v
+
+
+class HammingIndex:
+    """Multi-index hashing over 64-bit hashes.
+
+    Each hash is split into max_distance + 1 disjoint bit bands. By the pigeonhole
+    principle, two hashes within max_distance bits agree exactly on at least one band.
+    A query therefore only checks the entries that share a band value with it,
+    not the whole collection.
+    """
+
+    def __init__(self, max_distance: int = PHASH_MAX_DISTANCE, bits: int = HASH_BITS):
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        edges = [round(i * bits / n_bands) for i in range(n_bands + 1)]
+        self._bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        # band value -> ([hashes], [slots]); hashes are kept inline so a probe needs no indirection
+        self._tables = [{} for _ in self._bands]
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, h: int, key):
+        slot = len(self._keys)
+        self._keys.append(key)
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            bucket = table.get((h >> shift) & mask)
+            if bucket is None:
+                bucket = table[(h >> shift) & mask] = ([], [])
+            bucket[0].append(h)
+            bucket[1].append(slot)
+
+    def search(self, h: int, max_distance: int = None) -> list:
+        """All (distance, key) within max_distance of h, nearest first."""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        found = {}
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            bucket = table.get((h >> shift) & mask)
+            if bucket is None:
+                continue
+            hashes, slots = bucket
+            for i, other in enumerate(hashes):
+                d = (other ^ h).bit_count()
+                if d <= limit:
+                    found[slots[i]] = d  # a match may share several bands; keep it once
+        return sorted(((d, self._keys[slot]) for slot, d in found.items()), key=lambda x: x[0])
+
+
+class NearDuplicateIndex:
+    """Perceptual hashes of every verified upload: the phashes table plus an in-memory HammingIndex.
+
+    The phashes table is the source of truth, shared by the web process and a
+    separate worker tier. Each lookup first loads the rows added since the
+    last one (by rowid; the table is append-only), so hashes recorded by any
+    process are found. A video matches when at least half of its sampled
+    keyframes land near keyframes of the same stored file.
+    """
+
+    def __init__(self, max_distance: int = PHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._index = None
+        self._last_rowid = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "near_hits": 0}
+
+    def _refresh(self):
+        # caller holds self._lock
+        if self._index is None:
+            self._index = HammingIndex(self.max_distance)
+        conn = get_db()
+        for row in conn.execute("SELECT rowid, hash_value, phash FROM phashes WHERE rowid > ? ORDER BY rowid",
+                                (self._last_rowid,)):
+            self._index.add(_from_sqlite(row["phash"]), row["hash_value"])
+            self._last_rowid = row["rowid"]
+        return self._index
+
+    def find(self, phashes):
+        """Return (file_hash, distance) of the closest stored near-duplicate, or None."""
+        if not phashes:
+            return None
+        with self._lock:
+            index = self._refresh()
+            self._stats["lookups"] += 1
+            frames = defaultdict(int)
+            best = {}
+            for h in phashes:
+                per_frame = {}
+                for d, key in index.search(h):
+                    per_frame.setdefault(key, d)
+                for key, d in per_frame.items():
+                    frames[key] += 1
+                    best[key] = min(best.get(key, d), d)
+        needed = max(1, (len(phashes) + 1) // 2)
+        matches = [(-n, best[key], key) for key, n in frames.items() if n >= needed]
+        if not matches:
+            return None
+        _, distance, key = min(matches)
+        return key, distance
+
+    def record_hit(self):
+        # counted by the caller once the match's verdict was actually reused
+        with self._lock:
+            self._stats["near_hits"] += 1
+
+    def add(self, file_hash, phashes):
+        # indexed by the next lookup's refresh, in this process or any other
+        if not phashes:
+            return
+        conn = get_db()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO phashes (hash_value, frame, phash) VALUES (?, ?, ?)",
+                [(file_hash, i, _to_sqlite(h)) for i, h in enumerate(phashes)]
+            )
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["indexed_hashes"] = len(self._index) if self._index is not None else None
+        s["max_distance"] = self.max_distance
+        return s
+
+
+near_duplicates = NearDuplicateIndex()
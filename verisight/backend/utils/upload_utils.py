@@ -0,0 +1,63 @@
+import hashlib
+import os
+import tempfile
+import time
+from werkzeug.utils import secure_filename
+from backend.utils.metrics import observe
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def content_path(upload_dir: str, file_hash: str, filename: str = "") -> str:
+    """Content-addressed location: <upload_dir>/ab/cd/<sha256><ext>."""
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return os.path.join(upload_dir, file_hash[:2], file_hash[2:4], file_hash + ext)
+
+
+def save_upload_stream(stream, upload_dir: str, filename: str, max_bytes: int = None, chunk_size: int = CHUNK_SIZE):
+    """Copy an upload to disk in fixed-size chunks while hashing it.
+
+    The data goes to a temporary file in upload_dir and is then renamed into its
+    content-addressed path, so memory use does not grow with the file size and
+    readers never see a partially written file. Returns (sha256_hex, path, size).
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    sha = hashlib.sha256()
+    size = 0
+    spent = {"upload_read": 0.0, "upload_hash": 0.0, "upload_write": 0.0}  # summed over chunks
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                t0 = time.perf_counter()
+                chunk = stream.read(chunk_size)
+                t1 = time.perf_counter()
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                sha.update(chunk)
+                t2 = time.perf_counter()
+                out.write(chunk)
+                spent["upload_read"] += t1 - t0
+                spent["upload_hash"] += t2 - t1
+                spent["upload_write"] += time.perf_counter() - t2
+        for stage, seconds in spent.items():
+            observe(stage, seconds)
+        file_hash = sha.hexdigest()
+        final_path = content_path(upload_dir, file_hash, filename)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)  # identical bytes are already stored
+        else:
+            os.replace(tmp_path, final_path)
+        return file_hash, final_path, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
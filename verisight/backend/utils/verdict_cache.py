@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from backend.db.database import get_db
+from backend.utils.metrics import timed
+
+# Bump (or set DETECTOR_VERSION) whenever deepfake_check changes; verdicts stored
+# under another version are treated as misses and recomputed on next upload.
+DETECTOR_VERSION = os.getenv("DETECTOR_VERSION", "placeholder-1")
+
+# Placeholder results of verifications still waiting on (or abandoned by) a job
+PENDING = "pending"
+FAILED = "failed"
+
+
+class VerdictCache:
+    """Lookup-first verdicts keyed by content hash.
+
+    Misses are detected by the job queue (backend/utils/job_queue.py), which
+    also folds concurrent uploads of the same content into one job.
+    """
+
+    def __init__(self, detector_version=DETECTOR_VERSION):
+        self.detector_version = detector_version
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "near_hits": 0, "misses": 0, "stale": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def lookup(self, file_hash):
+        conn = get_db()
+        with timed("db_verdict_lookup"):
+            row = conn.execute(
+                "SELECT hash_value, data, result, detector_version FROM verifications "
+                "WHERE hash_value=? AND result NOT IN (?, ?) ORDER BY id DESC LIMIT 1",
+                (file_hash, PENDING, FAILED)
+            ).fetchone()
+        if row is None:
+            return None
+        if row["detector_version"] != self.detector_version:
+            self._count("stale")
+            return None
+        return dict(row)
+
+    def store(self, file_hash, filename, result, user_id=None, job_id=None, conn=None):
+        """Record one verification of this content (also the user's history entry).
+
+        With conn, the row is written in the caller's open transaction and not committed here.
+        """
+        sql = ("INSERT INTO verifications (user_id, kind, hash_value, data, result, detector_version, job_id, created_at) "
+               "VALUES (?, 'media', ?, ?, ?, ?, ?, ?)")
+        params = (user_id, file_hash, filename, result, self.detector_version, job_id, time.time())
+        if conn is not None:
+            conn.execute(sql, params)
+            return
+        conn = get_db()
+        with timed("db_verdict_store"), conn:
+            conn.execute(sql, params)
+
+    def complete_job(self, job_id, file_hash, filename, result):
+        """Fill in the pending rows of everyone waiting on job_id; store a verdict if there were none."""
+        conn = get_db()
+        with conn:
+            cur = conn.execute(
+                "UPDATE verifications SET result=?, detector_version=? WHERE job_id=? AND result=?",
+                (result, self.detector_version, job_id, PENDING)
+            )
+        if cur.rowcount == 0 and result != FAILED:
+            if conn.execute("SELECT 1 FROM verifications WHERE job_id=? LIMIT 1", (job_id,)).fetchone() is None:
+                self.store(file_hash, filename, result, job_id=job_id)
+
+    def record_hit(self, near=False):
+        self._count("near_hits" if near else "hits")
+
+    def record_miss(self):
+        self._count("misses")
+
+    def invalidate(self, keep_version=None):
+        """Delete stored verdicts not produced by keep_version (default: the current detector).
+
+        Rows that belong to a user's history are kept; lookup() already ignores them.
+        """
+        conn = get_db()
+        with conn:
+            cur = conn.execute(
+                "DELETE FROM verifications WHERE kind='media' AND user_id IS NULL "
+                "AND (detector_version IS NULL OR detector_version != ?)",
+                (keep_version or self.detector_version,)
+            )
+            return cur.rowcount
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s["hits"] + s["near_hits"] + s["misses"]
+        s["hit_rate"] = (s["hits"] + s["near_hits"]) / lookups if lookups else 0.0
+        s["detector_version"] = self.detector_version
+        return s
+
+
+verdicts = VerdictCache()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage cached media verdicts")
+    parser.add_argument("--invalidate", action="store_true",
+                        help="delete verdicts produced by any detector version other than the current one")
+    args = parser.parse_args()
+    if args.invalidate:
+        print(f"[DB] Removed {verdicts.invalidate()} stale verdicts (current detector {DETECTOR_VERSION}).")
+    else:
+        parser.print_help()
@@ -0,0 +1,96 @@
+# bench_ann.py
+# Recall@k vs. latency of the ann_index backends against exact search on a
+# synthetic, clustered corpus of normalised vectors (no model download needed).
+#
+#   python benchmarks/bench_ann.py --rows 200000 --dim 384 --nlist 1024 --nprobe 1 4 16 64
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai"))
+import ann_index  # noqa: E402
+
+
+def synthetic_corpus(rows, dim, n_topics, seed=0, dtype=np.float16):
+    # sentence embeddings cluster by topic, so mix topic centres with per-row noise
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    emb = np.empty((rows, dim), dtype=dtype)
+    for s in range(0, rows, 65536):
+        n = min(65536, rows - s)
+        block = centres[rng.integers(0, n_topics, size=n)] + 0.8 * rng.standard_normal((n, dim)).astype(np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        emb[s:s + n] = block
+    return emb
+
+
+def synthetic_queries(emb, n_queries, seed=1):
+    rng = np.random.default_rng(seed)
+    base = np.asarray(emb[rng.integers(0, len(emb), size=n_queries)], dtype=np.float32)
+    q = base + 0.3 * rng.standard_normal(base.shape).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def timed_search(backend, queries, k):
+    # one query at a time, which is how retrieve() calls the backend
+    rows, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        _, r = backend.search(q[None, :], k)
+        lat.append(time.perf_counter() - t0)
+        rows.append(r[0])
+    return np.array(rows), np.array(lat) * 1000.0
+
+
+def recall_at_k(truth, found):
+    hits = [len(set(t.tolist()) & set(f.tolist())) for t, f in zip(truth, found)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, nargs="+", default=[None])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    emb = synthetic_corpus(args.rows, args.dim, args.topics)
+    queries = synthetic_queries(emb, args.queries)
+
+    exact = ann_index.ExactSearch(emb)
+    truth, exact_ms = timed_search(exact, queries, args.k)
+    results = [{"backend": "exact", "nlist": None, "nprobe": None, "recall": 1.0,
+                "p50_ms": float(np.percentile(exact_ms, 50)), "p95_ms": float(np.percentile(exact_ms, 95))}]
+    print(f"rows={args.rows} dim={args.dim} k={args.k} queries={args.queries}")
+    print(f"{'backend':8} {'nlist':>6} {'nprobe':>6} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'exact':8} {'-':>6} {'-':>6} {1.0:9.3f} {results[0]['p50_ms']:8.2f} {results[0]['p95_ms']:8.2f}")
+
+    for nlist in args.nlist:
+        t0 = time.perf_counter()
+        ivf = ann_index.IVFSearch.train(emb, n_lists=nlist)
+        train_s = time.perf_counter() - t0
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            found, ms = timed_search(ivf, queries, args.k)
+            row = {"backend": "ivf", "nlist": ivf.n_lists, "nprobe": nprobe, "train_s": train_s,
+                   "recall": recall_at_k(truth, found),
+                   "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95))}
+            results.append(row)
+            print(f"{'ivf':8} {ivf.n_lists:6d} {nprobe:6d} {row['recall']:9.3f} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
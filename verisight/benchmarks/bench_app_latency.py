@@ -0,0 +1,82 @@
+# bench_app_latency.py
+# Cold-start and per-interaction latency of the Streamlit app, driven headlessly
+# through streamlit.testing.AppTest. Network calls are stubbed out so only
+# script execution and model work are measured.
+#
+# Compare two revisions of the app:
+#   git show <old-rev>:verisight/ai/app.py > /tmp/app_before.py
+#   python benchmarks/bench_app_latency.py --app /tmp/app_before.py
+#   python benchmarks/bench_app_latency.py
+import argparse
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+AI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai")
+sys.path.insert(0, AI_DIR)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+FEED = b"""<?xml version="1.0"?><rss><channel>
+<item><title>Flooding reported in Nairobi after heavy rain</title><link>https://www.bbc.com/news/1</link><pubDate>Mon, 06 Oct 2025 10:00:00 GMT</pubDate></item>
+<item><title>Heavy rain causes floods across Nairobi</title><link>https://nation.africa/news/2</link><pubDate>Mon, 06 Oct 2025 09:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+def fake_get(*args, **kwargs):
+    return mock.Mock(status_code=200, content=FEED, text=FEED.decode())
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default=os.path.join(AI_DIR, "app.py"))
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--claim", default="Nairobi is flooded after heavy rain")
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    results = {"app": args.app}
+    errors = []
+
+    def run(at, step):
+        ms = timed(at.run)
+        # a run that raised is fast for the wrong reason; record it so its timing isn't mistaken for a result
+        errors.extend(f"{step}: {e.message}" for e in at.exception)
+        return ms
+
+    with mock.patch("requests.get", fake_get), mock.patch("requests.Session.get", fake_get):
+        at = AppTest.from_file(args.app, default_timeout=600)
+        results["cold_start_ms"] = run(at, "cold_start")
+
+        rerun = []
+        for i in range(args.reruns):
+            at.text_area[0].input(f"{args.claim} {i}")
+            rerun.append(run(at, "widget_rerun"))
+        results["widget_rerun_ms"] = rerun
+
+        clicks = []
+        for _ in range(args.reruns):
+            at.button[0].click()
+            clicks.append(run(at, "verify"))
+        results["first_verify_ms"] = clicks[0]
+        results["verify_ms"] = clicks[1:]
+    results["errors"] = list(dict.fromkeys(errors))
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if results["errors"]:
+        sys.exit("The app raised during the run; the timings above are not comparable.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench_db_load.py
+# Requests per second of /api/register, /api/login and /api/verify under
+# concurrent clients, against a real threaded HTTP server and a throwaway
+# database. --legacy repeats the run with a fresh connection per call and the
+# default rollback journal, which is how database.py worked before WAL.
+#
+#   python benchmarks/bench_db_load.py --clients 16 --users 50 --legacy
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from backend.db import database  # noqa: E402
+from backend.routes import verify_routes  # noqa: E402
+
+
+def legacy_get_db():
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def client_session(base, user, uploads):
+    """register -> login -> N verifies for one user; returns [(endpoint, status, seconds)]."""
+    s = requests.Session()
+    out = []
+
+    def call(endpoint, fn):
+        t0 = time.perf_counter()
+        try:
+            status = fn().status_code
+        except requests.RequestException:
+            status = "conn-error"
+        out.append((endpoint, status, time.perf_counter() - t0))
+        return status
+
+    creds = {"username": user, "email": f"{user}@example.com", "password": "pw"}
+    call("register", lambda: s.post(f"{base}/api/register", json=creds))
+    token = {}
+
+    def login():
+        r = s.post(f"{base}/api/login", json=creds)
+        token["t"] = r.json().get("token") if r.status_code == 200 else None
+        return r
+    call("login", login)
+    headers = {"Authorization": f"Bearer {token.get('t')}"}
+    for i in range(uploads):
+        payload = os.urandom(4096)
+        call("verify", lambda: s.post(f"{base}/api/verify", headers=headers,
+                                      files={"file": (f"{user}-{i}.bin", payload)}))
+    return out
+
+
+def run(args, legacy):
+    work = tempfile.mkdtemp(prefix="verisight-load-")
+    database.DB_PATH = os.path.join(work, "load.db")
+    verify_routes.UPLOAD_FOLDER = os.path.join(work, "uploads")
+    database.init_db()
+    if legacy:
+        conn = sqlite3.connect(database.DB_PATH)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        patched = [m for m in list(sys.modules.values()) if getattr(m, "get_db", None) is database.get_db]
+        for m in patched:
+            m.get_db = legacy_get_db
+
+    from backend.app import create_app
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        futures = [pool.submit(client_session, base, f"user{n}", args.uploads) for n in range(args.users)]
+        calls = [c for f in futures for c in f.result()]
+    wall = time.perf_counter() - t0
+    server.shutdown()
+
+    result = {"mode": "legacy" if legacy else "wal", "clients": args.clients, "wall_s": round(wall, 2),
+              "requests_per_s": round(len(calls) / wall, 1)}
+    for endpoint in ("register", "login", "verify"):
+        rows = [c for c in calls if c[0] == endpoint]
+        lat = np.array([c[2] for c in rows]) * 1000.0
+        result[endpoint] = {
+            "requests": len(rows),
+            "status": dict(Counter(str(c[1]) for c in rows)),
+            "p50_ms": round(float(np.percentile(lat, 50)), 2),
+            "p95_ms": round(float(np.percentile(lat, 95)), 2),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--uploads", type=int, default=5, help="verify calls per user")
+    parser.add_argument("--legacy", action="store_true", help="also run with per-call connections and no WAL")
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # no per-request access log
+    results = [run(args, legacy=False)]
+    if args.legacy:
+        results.append(run(args, legacy=True))
+    for r in results:
+        print(f"{r['mode']:6}  {r['requests_per_s']:8.1f} req/s  wall={r['wall_s']} s")
+        for endpoint in ("register", "login", "verify"):
+            e = r[endpoint]
+            print(f"    {endpoint:8} p50={e['p50_ms']:7.2f} ms  p95={e['p95_ms']:7.2f} ms  status={e['status']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
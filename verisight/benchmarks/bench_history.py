@@ -0,0 +1,102 @@
+# bench_history.py
+# Page latency of the verification history as the reader goes deeper: keyset
+# cursors (backend.utils.history.page) vs. LIMIT/OFFSET over the same indexed
+# table. The synthetic database holds one heavy user among many light ones.
+#
+#   python benchmarks/bench_history.py --rows 1000000 --depths 0 1000 10000 100000 500000
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from backend.db import database  # noqa: E402
+from backend.utils import history  # noqa: E402
+
+
+def populate(rows, heavy_share, seed=0):
+    rng = random.Random(seed)
+    conn = database.get_db()
+    with conn:
+        conn.executemany("INSERT INTO users (username, email, password) VALUES (?, ?, 'x')",
+                         [(f"u{i}", f"u{i}@example.com") for i in range(1, 101)])
+    t = time.time() - rows
+    batch = []
+    for i in range(rows):
+        user = 1 if rng.random() < heavy_share else rng.randint(2, 100)
+        batch.append((user, rng.choice(("media", "claim")), f"{i:064x}", f"item {i}",
+                      rng.choice(("Real", "Fake", "High", "Low")), t + i))
+        if len(batch) == 50000:
+            with conn:
+                conn.executemany("INSERT INTO verifications (user_id, kind, hash_value, data, result, created_at) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        with conn:
+            conn.executemany("INSERT INTO verifications (user_id, kind, hash_value, data, result, created_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.execute("ANALYZE")
+
+
+def offset_page(user_id, offset, limit):
+    return database.get_db().execute(
+        f"SELECT {history.HISTORY_COLUMNS} FROM verifications WHERE user_id=? "
+        "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?", (user_id, limit, offset)
+    ).fetchall()
+
+
+def cursor_at(user_id, depth):
+    # the cursor a client holds after reading `depth` rows
+    if depth == 0:
+        return None
+    row = offset_page(user_id, depth - 1, 1)[0]
+    return history.encode_cursor(row["created_at"], row["id"])
+
+
+def timed(fn, repeats):
+    lat = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    return float(np.median(lat)) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--heavy-share", type=float, default=0.6, help="fraction of rows owned by user 1")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 100000, 500000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="verisight-history-")
+    database.DB_PATH = os.path.join(work, "history.db")
+    database.init_db()
+    t0 = time.perf_counter()
+    populate(args.rows, args.heavy_share)
+    total = database.get_db().execute("SELECT COUNT(*) FROM verifications WHERE user_id=1").fetchone()[0]
+    print(f"populated {args.rows} rows ({total} for the heavy user) in {time.perf_counter() - t0:.1f} s")
+
+    results = []
+    for depth in [d for d in args.depths if d < total]:
+        cursor = cursor_at(1, depth)
+        keyset_ms = timed(lambda: history.page(1, cursor=cursor, limit=args.limit), args.repeats)
+        offset_ms = timed(lambda: offset_page(1, depth, args.limit), max(3, args.repeats // 4))
+        results.append({"depth": depth, "keyset_ms": round(keyset_ms, 3), "offset_ms": round(offset_ms, 3)})
+        print(f"depth {depth:8d}   keyset {keyset_ms:8.3f} ms   offset {offset_ms:9.3f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
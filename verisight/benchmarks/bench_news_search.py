@@ -0,0 +1,101 @@
+# bench_news_search.py
+# Exercises ai/news_search.py against local stand-in feed servers (one RSS,
+# one Atom, one that always times out) so no real news site is contacted.
+# Reports a cold fan-out search, a warm TTL-cache hit, and the sequential
+# per-source time the fan-out replaces.
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai"))
+import news_search  # noqa: E402
+
+RSS = """<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>"""
+RSS_ITEM = "<item><title>{q} report {i}</title><link>https://www.example-news.com/{i}</link><pubDate>Mon, 06 Oct 2025 10:0{i}:00 GMT</pubDate></item>"
+ATOM = """<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{items}</feed>"""
+ATOM_ENTRY = "<entry><title>{q} update {i}</title><link href=\"https://example-news.com/{i}/\"/><updated>2025-10-06T10:0{i}:00Z</updated></entry>"
+
+
+def make_handler(delay):
+    class FeedHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = parse_qs(url.query).get("q", [""])[0]
+            time.sleep(delay.get(url.path, 0.0))
+            if url.path == "/atom":
+                body = ATOM.format(items="".join(ATOM_ENTRY.format(q=q, i=i) for i in range(4)))
+            else:
+                body = RSS.format(items="".join(RSS_ITEM.format(q=q, i=i) for i in range(6)))
+            data = body.encode("utf-8")
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return FeedHandler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated per-feed latency (s)")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    delay = {"/rss": args.latency, "/atom": args.latency, "/slow": 5.0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(delay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    sources = [
+        {"name": "rss", "url": base + "/rss?q={query}", "timeout": 2},
+        {"name": "atom", "url": base + "/atom?q={query}", "timeout": 2},
+        {"name": "slow", "url": base + "/slow?q={query}", "timeout": 0.5},
+    ]
+    searcher = news_search.NewsSearcher(sources=sources, cache=news_search.TTLCache(ttl=60))
+
+    queries = [f"Nairobi floods {i}" for i in range(args.queries)]
+    cold, warm = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results = searcher.search(q)
+        cold.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        searcher.search(q.upper() + "  ")  # same normalised query -> cache hit
+        warm.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    batch = searcher.search_many([f"Mombasa port {i}" for i in range(args.queries)])
+    batch_s = time.perf_counter() - t0
+
+    report = {
+        "sources": len(sources),
+        "results_per_query": len(results),
+        "dedup_example": [r["link"] for r in results],
+        "cold_ms_mean": 1000 * sum(cold) / len(cold),
+        "warm_ms_mean": 1000 * sum(warm) / len(warm),
+        "sequential_ms_estimate": 1000 * (2 * args.latency + 0.5),
+        "search_many_ms": 1000 * batch_s,
+        "search_many_queries": len(batch),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
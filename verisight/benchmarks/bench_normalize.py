@@ -0,0 +1,69 @@
+# bench_normalize.py
+# Docs/second of the old per-call normalize() (full en_core_web_sm pipeline,
+# one text at a time) against normalizer.normalize_batch (trimmed pipeline
+# through nlp.pipe), on synthetic claim/headline texts.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai"))
+import normalizer  # noqa: E402
+
+PLACES = ["Nairobi", "Mombasa", "Kisumu", "London", "Washington", "Lagos", "Kampala"]
+PEOPLE = ["William Ruto", "Raila Odinga", "Joe Biden", "Rishi Sunak", "the Interior Ministry"]
+EVENTS = ["announced new fuel prices", "denied reports of a curfew", "confirmed floods",
+          "opened a new railway line", "suspended the county assembly", "met protest leaders"]
+
+
+def synthetic_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(PEOPLE)} {rng.choice(EVENTS)} in {rng.choice(PLACES)} on {rng.randint(1, 28)} October "
+            f"{rng.randint(2019, 2025)}, according to {rng.choice(['BBC', 'Reuters', 'Nation', 'CNN'])}."
+            for _ in range(n)]
+
+
+def rate(fn, texts):
+    t0 = time.perf_counter()
+    out = fn(texts)
+    return len(texts) / (time.perf_counter() - t0), out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    import spacy
+    texts = synthetic_texts(args.docs)
+    full = spacy.load(normalizer.SPACY_MODEL)
+    trimmed = normalizer.load_trimmed()
+    full("warm up"), trimmed("warm up")
+
+    per_call, base = rate(lambda ts: [normalizer.normalize(t, full) for t in ts], texts)
+    trimmed_call, _ = rate(lambda ts: [normalizer.normalize(t, trimmed) for t in ts], texts)
+    batched, out = rate(lambda ts: normalizer.normalize_batch(ts, trimmed, batch_size=args.batch_size,
+                                                              n_process=args.n_process), texts)
+    report = {
+        "docs": args.docs,
+        "full_pipes": full.pipe_names,
+        "trimmed_pipes": [n for n, _ in trimmed.pipeline],
+        "per_call_full_docs_per_s": per_call,
+        "per_call_trimmed_docs_per_s": trimmed_call,
+        "batched_trimmed_docs_per_s": batched,
+        "speedup": batched / per_call,
+        "same_output": out == base,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench_phash.py
+# Near-duplicate lookups per second of backend.utils.phash.HammingIndex over
+# random 64-bit hashes, checked against a brute-force NumPy scan.
+# Half of the queries are stored hashes with a few flipped bits (the
+# recompressed copies); the other half are unrelated hashes.
+#
+#   python benchmarks/bench_phash.py --rows 1000000 --distance 4
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from backend.utils.phash import HammingIndex  # noqa: E402
+
+
+def perturbed(rng, h, max_flips):
+    for bit in rng.choice(64, size=rng.integers(0, max_flips + 1), replace=False):
+        h ^= 1 << int(bit)
+    return h
+
+
+def popcount64(x):
+    x = x.view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(x, axis=1).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--distance", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--verify", type=int, default=200, help="queries to check against brute force")
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    stored = rng.integers(0, 2 ** 64, size=args.rows, dtype=np.uint64)
+    t0 = time.perf_counter()
+    index = HammingIndex(args.distance)
+    for i, h in enumerate(stored.tolist()):
+        index.add(h, i)
+    build_s = time.perf_counter() - t0
+    print(f"built index of {args.rows} hashes in {build_s:.1f} s ({args.distance + 1} bands)")
+
+    picks = rng.integers(0, args.rows, size=args.queries // 2)
+    near = [perturbed(rng, int(stored[i]), args.distance) for i in picks]
+    far = rng.integers(0, 2 ** 64, size=args.queries - len(near), dtype=np.uint64).tolist()
+    queries = near + [int(h) for h in far]
+
+    lat = np.empty(len(queries))
+    hits = 0
+    for j, q in enumerate(queries):
+        t = time.perf_counter()
+        found = index.search(q)
+        lat[j] = time.perf_counter() - t
+        hits += bool(found)
+    lat_us = lat * 1e6
+
+    mismatches = 0
+    for q in queries[:args.verify // 2] + queries[-(args.verify // 2):]:
+        d = popcount64(stored ^ np.uint64(q))
+        truth = set(np.nonzero(d <= args.distance)[0].tolist())
+        mismatches += truth != {key for _, key in index.search(q)}
+
+    result = {
+        "rows": args.rows,
+        "max_distance": args.distance,
+        "build_s": round(build_s, 2),
+        "lookups_per_s": round(len(queries) / lat.sum()),
+        "p50_us": round(float(np.percentile(lat_us, 50)), 1),
+        "p99_us": round(float(np.percentile(lat_us, 99)), 1),
+        "near_queries_found": f"{hits}/{len(queries)} (expected >= {len(near)})",
+        "brute_force_mismatches": mismatches,
+    }
+    for k, v in result.items():
+        print(f"{k:24} {v}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
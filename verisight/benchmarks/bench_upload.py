@@ -0,0 +1,91 @@
+# bench_upload.py
+# Peak Python memory and throughput of POST /api/verify as the upload grows,
+# through the Flask test client against a throwaway database and upload dir.
+# A copy of the old read-everything handler is registered at /legacy/verify
+# so both can be compared in one run.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from flask import jsonify, request  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from backend.app import create_app  # noqa: E402
+from backend.db import database  # noqa: E402
+from backend.routes import verify_routes  # noqa: E402
+
+
+def legacy_verify():
+    # the pre-streaming handler body: whole upload in memory, hashed, then written out
+    file = request.files["file"]
+    file_bytes = file.read()
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    with open(os.path.join(verify_routes.UPLOAD_FOLDER, f"{file_hash}_{file.filename}"), "wb") as f:
+        f.write(file_bytes)
+    return jsonify({"hash": file_hash}), 200
+
+
+def write_random_file(path, size_mb):
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+
+
+def measure(client, url, path, headers):
+    with open(path, "rb") as fh:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        resp = client.post(url, data={"file": (fh, os.path.basename(path))}, headers=headers,
+                           content_type="multipart/form-data")
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return resp.status_code, peak / 2 ** 20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--legacy", action="store_true", help="also measure the old in-memory handler")
+    parser.add_argument("--json", help="write results to this file as JSON")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="verisight-bench-")
+    database.DB_PATH = os.path.join(work, "bench.db")
+    database.init_db()
+    verify_routes.UPLOAD_FOLDER = os.path.join(work, "uploads")
+    verify_routes.MAX_UPLOAD_BYTES = (max(args.sizes_mb) + 1) * 1024 * 1024
+
+    app = create_app()
+    app.config["MAX_CONTENT_LENGTH"] = None
+    app.add_url_rule("/legacy/verify", "legacy_verify", legacy_verify, methods=["POST"])
+    client = app.test_client()
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='bench')}"}
+
+    results = []
+    for size in args.sizes_mb:
+        path = os.path.join(work, f"upload-{size}mb.bin")
+        write_random_file(path, size)
+        targets = [("streaming", "/api/verify")] + ([("legacy", "/legacy/verify")] if args.legacy else [])
+        for name, url in targets:
+            status, peak_mb, seconds = measure(client, url, path, headers)
+            results.append({"handler": name, "size_mb": size, "status": status, "peak_mb": round(peak_mb, 2),
+                            "seconds": round(seconds, 3), "mb_per_s": round(size / seconds, 1)})
+            print(f"{name:9} {size:5d} MB  status={status}  peak={peak_mb:8.2f} MB  {size / seconds:7.1f} MB/s")
+        os.remove(path)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# run_all.py
+# Offline benchmark suite for the hot paths: vector retrieval, evidence
+# scoring, the local evidence store, FEVER preprocessing, uploads through the
+# Flask test client and SQLite verdict inserts/lookups. Everything runs on
+# synthetic data with deterministic stub encoders (seeded), so no network and
+# no model downloads. One JSON document comes out, so two commits can be compared:
+#
+#   python benchmarks/run_all.py --json before.json
+#   git checkout <other-rev> && python benchmarks/run_all.py --json after.json
+#   python benchmarks/run_all.py --compare before.json after.json
+#
+# Sections whose optional dependency is missing (FEVER preprocessing needs
+# `datasets`) are reported as skipped rather than failing the run.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, os.path.join(ROOT, "ai"))
+sys.path.insert(0, ROOT)
+import bench_ann  # noqa: E402
+
+SECTIONS = ("retrieval", "scoring", "evidence_store", "fever", "upload", "sqlite")
+
+WORDS = ("flood", "nairobi", "president", "election", "fuel", "prices", "curfew", "railway", "county", "assembly",
+         "protest", "police", "ministry", "budget", "court", "ruling", "vaccine", "drought", "schools", "strike",
+         "market", "bank", "rates", "senate", "bill", "health", "airport", "storm", "border", "trade")
+# headline-sized vocabulary for the text corpora: a few topical words plus a long tail, so a
+# BM25 prefilter sees realistic selectivity rather than every document matching every query
+VOCAB = WORDS + tuple(f"term{i}" for i in range(5000))
+DOMAINS = ("bbc.co.uk", "www.bbc.com", "cnn.com", "theguardian.com", "nation.africa", "standardmedia.co.ke",
+           "data.gov", "police.go.ke", "example-blog.net", "news.example.org")
+
+
+class StubEncoder:
+    """Deterministic bag-of-hashed-words embeddings with SentenceTransformer.encode's signature.
+
+    Texts sharing words get similar vectors, which is all retrieval and
+    reranking need to be exercised; nothing is downloaded.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False, batch_size=64,
+               show_progress_bar=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                h = zlib.crc32(word.encode("utf-8"))
+                out[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+
+def synthetic_sentences(n, seed=0, words=12):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCAB, k=words)) for _ in range(n)]
+
+
+def synthetic_news(n, seed=0, now=None):
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    return [{"title": " ".join(rng.choices(WORDS, k=10)),
+             "link": f"https://{rng.choice(DOMAINS)}/news/{i}",
+             "pubDate": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(now - rng.randint(0, 30 * 86400)))}
+            for i in range(n)]
+
+
+def latency(fn, repeats):
+    lat = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    lat = np.array(lat) * 1000.0
+    return {"p50_ms": round(float(np.percentile(lat, 50)), 3), "p95_ms": round(float(np.percentile(lat, 95)), 3)}
+
+
+# -----------------------
+# Sections
+# -----------------------
+def bench_retrieval(args):
+    import ann_index
+    results = []
+    for rows in args.retrieval_sizes:
+        t0 = time.perf_counter()
+        emb = bench_ann.synthetic_corpus(rows, args.dim, max(64, rows // 500))
+        build_s = time.perf_counter() - t0
+        queries = bench_ann.synthetic_queries(emb, args.queries)
+        exact = ann_index.ExactSearch(emb)
+        truth, ms = bench_ann.timed_search(exact, queries, args.k)
+        t0 = time.perf_counter()
+        exact.search(queries, args.k)
+        batch_s = time.perf_counter() - t0
+        row = {"rows": rows, "dim": args.dim, "corpus_build_s": round(build_s, 3),
+               "exact": {"p50_ms": round(float(np.percentile(ms, 50)), 3),
+                         "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                         "batch_queries_per_s": round(len(queries) / batch_s, 1)}}
+        if args.ivf:
+            t0 = time.perf_counter()
+            ivf = ann_index.IVFSearch.train(emb, n_lists=max(16, int(np.sqrt(rows))), nprobe=args.nprobe)
+            train_s = time.perf_counter() - t0
+            found, ms = bench_ann.timed_search(ivf, queries, args.k)
+            row["ivf"] = {"n_lists": ivf.n_lists, "nprobe": args.nprobe, "train_s": round(train_s, 2),
+                          "recall": round(bench_ann.recall_at_k(truth, found), 4),
+                          "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                          "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+        print(f"  retrieval {rows:>8} rows  exact p50 {row['exact']['p50_ms']:.2f} ms"
+              + (f"  ivf p50 {row['ivf']['p50_ms']:.2f} ms recall {row['ivf']['recall']:.3f}" if args.ivf else ""))
+        results.append(row)
+        del emb, exact
+    return results
+
+
+def bench_scoring(args):
+    import scoring
+    try:
+        import pipeline
+    except ImportError:
+        pipeline = None  # per-item wrappers need the pipeline's imports; vectorized scoring does not
+    now = time.time()
+    results = []
+    for n in args.scoring_sizes:
+        news = synthetic_news(n, seed=n, now=now)
+        sims = np.random.default_rng(n).random(n).astype(np.float32)
+        links, dates = [x["link"] for x in news], [x["pubDate"] for x in news]
+        scoring.parse_date.cache_clear()
+        t0 = time.perf_counter()
+        scoring.score_candidates(sims, links, dates, k=args.k, now=now)
+        cold_ms = (time.perf_counter() - t0) * 1000.0
+        row = {"candidates": n, "vectorized_cold_ms": round(cold_ms, 3),
+               "vectorized": latency(lambda: scoring.score_candidates(sims, links, dates, k=args.k, now=now),
+                                     args.repeats)}
+        if pipeline is not None:
+            def per_item():
+                confs = [pipeline.aggregate_confidence(pipeline.source_score_from_url(link), float(s))
+                         for link, s in zip(links, sims)]
+                return sorted(confs, reverse=True)[:args.k]
+            row["per_item"] = latency(per_item, max(1, args.repeats // 4))
+            row["score_evidence"] = latency(lambda: pipeline.score_evidence(news, sims), max(1, args.repeats // 4))
+        print(f"  scoring {n:>7} candidates  vectorized p50 {row['vectorized']['p50_ms']:.2f} ms"
+              + (f"  per-item p50 {row['per_item']['p50_ms']:.2f} ms" if "per_item" in row else ""))
+        results.append(row)
+    return results
+
+
+def bench_evidence_store(args, work):
+    import evidence_store
+    encoder = StubEncoder(args.dim)
+    store = evidence_store.EvidenceStore(os.path.join(work, "evidence.sqlite"), encode=encoder.encode)
+    docs = synthetic_sentences(args.store_rows, seed=1)
+    t0 = time.perf_counter()
+    for s in range(0, len(docs), 2000):
+        store.add([{"key": f"corpus:{i}", "kind": "corpus", "text": docs[i]} for i in range(s, min(s + 2000, len(docs)))])
+    ingest_s = time.perf_counter() - t0
+    rng = random.Random(2)
+    queries = [" ".join(rng.choices(VOCAB, k=6)) for _ in range(args.queries)]
+    it = iter(queries * (args.repeats // len(queries) + 2))
+    result = {"rows": len(store), "ingest_rows_per_s": round(len(docs) / ingest_s, 1),
+              "search": latency(lambda: store.search(next(it), k=args.k), min(args.repeats * 5, len(queries)))}
+    print(f"  evidence_store {result['rows']} rows  ingest {result['ingest_rows_per_s']:.0f}/s  "
+          f"search p50 {result['search']['p50_ms']:.2f} ms")
+    return result
+
+
+def synthetic_fever(path, n, seed=0):
+    rng = random.Random(seed)
+    labels = ("SUPPORTS", "REFUTES", "NOT ENOUGH INFO")
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            label = rng.choice(labels)
+            evidence = [] if label == labels[2] else [
+                [[i, j, " ".join(rng.choices(WORDS, k=15)), j] for j in range(rng.randint(1, 3))]
+                for _ in range(rng.randint(1, 2))]
+            f.write(json.dumps({"id": i, "claim": " ".join(rng.choices(WORDS, k=9)), "label": label,
+                                "evidence": evidence}) + "\n")
+
+
+def bench_fever(args, work):
+    try:
+        import preprocess
+    except ImportError as e:
+        return {"skipped": f"preprocess needs an optional dependency: {e}"}
+    path = os.path.join(work, "fever.synthetic.jsonl")
+    synthetic_fever(path, args.fever_claims)
+    size_mb = os.path.getsize(path) / 2 ** 20
+    t0 = time.perf_counter()
+    preprocess.file_digest(path)
+    result = {"claims": args.fever_claims, "file_mb": round(size_mb, 2),
+              "digest_mb_per_s": round(size_mb / (time.perf_counter() - t0), 1)}
+    for expand in (False, True):
+        t0 = time.perf_counter()
+        shards = preprocess.byte_shards(path, 4)
+        rows = sum(1 for _ in preprocess.generate_examples(shards, path, expand_evidence=expand))
+        elapsed = time.perf_counter() - t0
+        result["expand" if expand else "first"] = {"rows": rows, "rows_per_s": round(rows / elapsed, 1)}
+    print(f"  fever {args.fever_claims} claims  first {result['first']['rows_per_s']:.0f} rows/s  "
+          f"expand {result['expand']['rows_per_s']:.0f} rows/s")
+    return result
+
+
+def bench_upload(args, work):
+    from flask_jwt_extended import create_access_token
+    from backend.app import create_app
+    from backend.db import database
+    from backend.routes import verify_routes
+    from backend.utils.job_queue import job_queue
+
+    database.DB_PATH = os.path.join(work, "upload.db")
+    verify_routes.UPLOAD_FOLDER = os.path.join(work, "uploads")
+    os.makedirs(verify_routes.UPLOAD_FOLDER, exist_ok=True)
+    job_queue.max_workers = 0  # measure the request path (hash, save, enqueue), not detection
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='bench')}"}
+
+    results = []
+    for size in args.upload_sizes_mb:
+        path = os.path.join(work, f"upload-{size}mb.bin")
+        with open(path, "wb") as f:
+            f.write(np.random.default_rng(size).bytes(size * 2 ** 20))
+        row = {"size_mb": size}
+        for name in ("first", "repeat"):  # repeat hits the coalescing path for the same content
+            with open(path, "rb") as fh:
+                t0 = time.perf_counter()
+                resp = client.post("/api/verify", data={"file": (fh, os.path.basename(path))}, headers=headers,
+                                   content_type="multipart/form-data")
+                elapsed = time.perf_counter() - t0
+            row[name] = {"status": resp.status_code, "ms": round(elapsed * 1000.0, 2),
+                         "mb_per_s": round(size / elapsed, 1)}
+        print(f"  upload {size:>4} MB  first {row['first']['mb_per_s']:.0f} MB/s (status {row['first']['status']})  "
+              f"repeat {row['repeat']['ms']:.1f} ms")
+        results.append(row)
+        os.remove(path)
+    return results
+
+
+def bench_sqlite(args, work):
+    from backend.db import database
+    from backend.utils.verdict_cache import verdicts
+
+    database.DB_PATH = os.path.join(work, "sqlite.db")
+    database.init_db()
+    rng = random.Random(3)
+    hashes = [f"{rng.getrandbits(256):064x}" for _ in range(args.sqlite_rows)]
+    t0 = time.perf_counter()
+    for i, h in enumerate(hashes):
+        verdicts.store(h, f"file{i}.jpg", "Real")  # one transaction per verdict, as the routes do
+    insert_s = time.perf_counter() - t0
+    hits = iter(rng.choices(hashes, k=args.repeats * 50))
+    misses = iter(f"{rng.getrandbits(256):064x}" for _ in range(args.repeats * 50))
+    result = {"rows": args.sqlite_rows, "inserts_per_s": round(args.sqlite_rows / insert_s, 1),
+              "lookup_hit": latency(lambda: verdicts.lookup(next(hits)), args.repeats * 50),
+              "lookup_miss": latency(lambda: verdicts.lookup(next(misses)), args.repeats * 50)}
+    print(f"  sqlite {args.sqlite_rows} rows  {result['inserts_per_s']:.0f} inserts/s  "
+          f"lookup p50 {result['lookup_hit']['p50_ms']:.3f} ms")
+    return result
+
+
+# -----------------------
+# Comparison
+# -----------------------
+def flatten(obj, prefix=""):
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from flatten(v, f"{prefix}.{k}" if prefix else k)
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            # label list rows by their size field so reordering sizes doesn't misalign them
+            key = next((f"{k}={v[k]}" for k in ("rows", "candidates", "size_mb") if isinstance(v, dict) and k in v), i)
+            yield from flatten(v, f"{prefix}[{key}]")
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix, obj
+
+
+def compare(before_path, after_path, tolerance):
+    """Print metrics that moved by more than `tolerance`; returns how many regressed."""
+    with open(before_path, encoding="utf-8") as f:
+        before = dict(flatten(json.load(f)["results"]))
+    with open(after_path, encoding="utf-8") as f:
+        after = dict(flatten(json.load(f)["results"]))
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        higher_is_better = key.endswith("per_s") or key.endswith("recall")
+        if not (higher_is_better or key.endswith("_ms") or key.endswith("_s")) or before[key] == 0:
+            continue
+        ratio = after[key] / before[key]
+        worse = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+        better = ratio > 1 + tolerance if higher_is_better else ratio < 1 - tolerance
+        if worse or better:
+            regressions += worse
+            print(f"{'REGRESSED' if worse else 'improved ':9}  {key:60} {before[key]:>12g} -> {after[key]:<12g} ({ratio:.2f}x)")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (synthetic data, stub encoders)")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, help="run just these sections")
+    parser.add_argument("--retrieval-sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ivf", action="store_true", help="also train and time IVF search (slow at 1M rows)")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--scoring-sizes", type=int, nargs="+", default=[10, 1000, 10000, 50000])
+    parser.add_argument("--store-rows", type=int, default=50000)
+    parser.add_argument("--fever-claims", type=int, default=50000)
+    parser.add_argument("--upload-sizes-mb", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--sqlite-rows", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two result files and exit")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative change reported by --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.tolerance) else 0)
+
+    work = tempfile.mkdtemp(prefix="verisight-run-all-")
+    runners = {
+        "retrieval": lambda: bench_retrieval(args),
+        "scoring": lambda: bench_scoring(args),
+        "evidence_store": lambda: bench_evidence_store(args, work),
+        "fever": lambda: bench_fever(args, work),
+        "upload": lambda: bench_upload(args, work),
+        "sqlite": lambda: bench_sqlite(args, work),
+    }
+    results, failed = {}, []
+    for name in args.only or SECTIONS:
+        print(f"[{name}]")
+        t0 = time.perf_counter()
+        try:
+            results[name] = runners[name]()
+        except Exception as e:  # keep the other sections' numbers
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            failed.append(name)
+            print(f"  failed: {results[name]['error']}")
+        if isinstance(results[name], dict) and "skipped" in results[name]:
+            print(f"  skipped: {results[name]['skipped']}")
+        print(f"  ({time.perf_counter() - t0:.1f} s)")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,39 @@
-import requests
+import argparse
+import os
+import sys
 
-# Backend endpoint
-url = "http://127.0.0.1:5000/api/verify"
+import requests
 
-# Replace with the JWT token you got after login
-token = "YOUR_JWT_TOKEN_HERE"
+# Manual check of POST /api/verify against a running backend:
+#   python test_verify.py path/to/file.jpg --token <JWT>
+#   VERISIGHT_TOKEN=<JWT> python test_verify.py path/to/file.jpg
+#   python test_verify.py path/to/file.jpg --username alice --password secret
+parser = argparse.ArgumentParser(description="Upload one file to the VeriSight backend for verification")
+parser.add_argument("file", help="image/video to verify")
+parser.add_argument("--api", default=os.getenv("VERISIGHT_API", "http://127.0.0.1:5000"), help="backend base URL")
+parser.add_argument("--token", default=os.getenv("VERISIGHT_TOKEN"), help="JWT from /api/login (or VERISIGHT_TOKEN)")
+parser.add_argument("--username", help="log in with these credentials instead of passing a token")
+parser.add_argument("--password")
+parser.add_argument("--wait", type=float, default=30, help="seconds the backend may hold the request for the verdict")
+args = parser.parse_args()
 
-# Path to the file you want to verify
-file_path = "C:/path/to/file.jpg"
+api = args.api.rstrip("/")
+token = args.token
+if args.username:
+    r = requests.post(f"{api}/api/login", json={"username": args.username, "password": args.password})
+    if r.status_code != 200:
+        sys.exit(f"Login failed: {r.json().get('error')}")
+    token = r.json()["token"]
+if not token:
+    parser.error("a token is required: pass --token, set VERISIGHT_TOKEN or use --username/--password")
 
 # Prepare files and headers
-files = {"file": open(file_path, "rb")}
 headers = {"Authorization": f"Bearer {token}"}
+with open(args.file, "rb") as f:
+    response = requests.post(f"{api}/api/verify", files={"file": f}, headers=headers, params={"wait": args.wait})
 
-# Make the POST request
-response = requests.post(url, files=files, headers=headers)
-
-# Print the result
-print(response.json())
+# Print the result (202 means the detection job is still queued or running)
+print(response.status_code, response.json())
+if response.status_code == 202:
+    print(f"Poll {api}{response.json()['status_url']} for the verdict.")
+sys.exit(0 if response.status_code in (200, 202) else 1)
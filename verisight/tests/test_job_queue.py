@@ -0,0 +1,181 @@
+import sqlite3
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import backend.db.database as database
+from backend.utils.job_queue import JobQueue
+from backend.utils.verdict_cache import FAILED, PENDING
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "verisight.db"))
+    database.migrate()
+    q = JobQueue(max_workers=0, max_attempts=2)
+    q.owner = "test:1:owner"  # normally set by start(), which would also spawn the pool
+    yield q
+    database.close_db()
+
+
+def resolved(result=None, error=None):
+    f = Future()
+    if error is not None:
+        f.set_exception(error)
+    else:
+        f.set_result(result)
+    return f
+
+
+def dispatch(q):
+    """Claim the next job the way _dispatch_loop does, without a process pool."""
+    job = q._claim()
+    assert job is not None
+    q._running += 1
+    q._in_flight.add(job["id"])
+    return job
+
+
+def rows(job_id):
+    conn = database.get_db()
+    return [r["result"] for r in conn.execute("SELECT result FROM verifications WHERE job_id=? ORDER BY id", (job_id,))]
+
+
+def test_enqueue_coalesces_uploads_of_the_same_content(queue):
+    first = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg", user_id=None)
+    second = queue.enqueue("h1", "/tmp/a.jpg", "copy.jpg", user_id=None)
+    other = queue.enqueue("h2", "/tmp/b.jpg", "b.jpg")
+    assert first == second != other
+    assert rows(first) == [PENDING, PENDING]
+    assert queue.stats()["enqueued"] == 2
+    assert queue.stats()["coalesced"] == 1
+
+
+def test_only_one_active_job_per_hash(queue):
+    queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    conn = database.get_db()
+    with pytest.raises(sqlite3.IntegrityError):
+        with conn:
+            conn.execute("INSERT INTO jobs (id, hash_value, file_path, filename, status, created_at) "
+                         "VALUES ('dup', 'h1', '/tmp/a.jpg', 'a.jpg', 'queued', 0)")
+
+
+def test_joining_a_job_that_already_finished_fills_the_pending_row(queue, monkeypatch):
+    job_id = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    queue._finish(dispatch(queue), resolved("Real"))
+    finished = queue.get(job_id)
+    monkeypatch.setattr(queue, "find_active", lambda file_hash: finished)
+    assert queue.enqueue("h1", "/tmp/a.jpg", "late.jpg") == job_id
+    assert rows(job_id) == ["Real", "Real"]
+
+
+def test_a_new_upload_after_completion_starts_a_new_job(queue):
+    first = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    queue._finish(dispatch(queue), resolved("Real"))
+    assert queue.enqueue("h1", "/tmp/a.jpg", "a.jpg") != first
+
+
+def test_claim_records_owner_and_lease(queue):
+    job_id = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    job = dispatch(queue)
+    stored = queue.get(job_id)
+    assert job["id"] == job_id and job["attempts"] == 1
+    assert stored["status"] == "running" and stored["owner"] == queue.owner
+    assert stored["lease_until"] > time.time()
+    assert queue._claim() is None
+
+
+def test_finish_completes_every_pending_row(queue):
+    job_id = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    queue.enqueue("h1", "/tmp/a.jpg", "b.jpg")
+    queue._finish(dispatch(queue), resolved("Real"))
+    job = queue.get(job_id)
+    assert (job["status"], job["result"], job["lease_until"]) == ("done", "Real", None)
+    assert rows(job_id) == ["Real", "Real"]
+    s = queue.stats()
+    assert (s["completed"], s["in_flight"]) == (1, 0)
+
+
+def test_failures_are_retried_with_backoff_then_fail(queue):
+    job_id = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    queue._finish(dispatch(queue), resolved(error=RuntimeError("boom")))
+    job = queue.get(job_id)
+    assert (job["status"], job["owner"], job["error"]) == ("queued", None, "boom")
+    assert job["not_before"] > time.time()
+    assert queue._claim() is None  # still backing off
+    assert rows(job_id) == [PENDING]
+
+    conn = database.get_db()
+    with conn:
+        conn.execute("UPDATE jobs SET not_before=0 WHERE id=?", (job_id,))
+    queue._finish(dispatch(queue), resolved(error=RuntimeError("boom again")))
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 2)
+    assert rows(job_id) == [FAILED]
+    s = queue.stats()
+    assert (s["retried"], s["failed"], s["in_flight"]) == (1, 1, 0)
+
+
+def test_a_run_whose_lease_was_taken_over_is_discarded(queue):
+    job_id = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    job = dispatch(queue)
+    conn = database.get_db()
+    with conn:
+        conn.execute("UPDATE jobs SET owner='other:2:owner' WHERE id=?", (job_id,))
+    queue._finish(job, resolved("Fake"))
+    assert queue.get(job_id)["status"] == "running"
+    assert rows(job_id) == [PENDING]
+    s = queue.stats()
+    assert (s["superseded"], s["completed"], s["in_flight"]) == (1, 0, 0)
+
+
+def test_requeue_orphans_only_takes_lapsed_leases(queue):
+    live = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    dead = queue.enqueue("h2", "/tmp/b.jpg", "b.jpg")
+    dispatch(queue)
+    dispatch(queue)
+    conn = database.get_db()
+    with conn:
+        conn.execute("UPDATE jobs SET lease_until=? WHERE id=?", (time.time() - 1, dead))
+    queue.requeue_orphans()
+    assert queue.get(live)["status"] == "running"
+    requeued = queue.get(dead)
+    assert (requeued["status"], requeued["owner"], requeued["lease_until"]) == ("queued", None, None)
+
+
+def test_renewing_extends_only_this_owners_leases(queue):
+    job_id = queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    dispatch(queue)
+    conn = database.get_db()
+    with conn:
+        conn.execute("UPDATE jobs SET lease_until=? WHERE id=?", (time.time() + 1, job_id))
+    queue._renew_leases()
+    assert queue.get(job_id)["lease_until"] > time.time() + 10
+
+    with conn:
+        conn.execute("UPDATE jobs SET owner='other:2:owner', lease_until=0 WHERE id=?", (job_id,))
+    queue._renew_leases()
+    assert queue.get(job_id)["lease_until"] == 0
+
+
+def test_a_database_error_while_finishing_still_frees_the_slot(queue, monkeypatch):
+    queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    job = dispatch(queue)
+
+    def broken():
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr("backend.utils.job_queue.get_db", broken)
+    queue._finish(job, resolved("Real"))
+    assert queue._running == 0 and not queue._in_flight
+    assert queue._counts["errored"] == 1
+
+
+def test_reused_verdicts_are_not_timed_as_detector_runs(queue, monkeypatch):
+    observed = []
+    monkeypatch.setattr("backend.utils.job_queue.observe", lambda stage, seconds: observed.append(stage))
+    queue.enqueue("h1", "/tmp/a.jpg", "a.jpg")
+    queue._finish(dispatch(queue), resolved("Real"), near_duplicate=("h0", 2), reused=True)
+    queue.enqueue("h2", "/tmp/b.jpg", "b.jpg")
+    queue._finish(dispatch(queue), resolved("Real"))
+    assert observed == ["job_queue_wait", "near_duplicate_reuse", "job_queue_wait", "detect_run"]
@@ -0,0 +1,36 @@
+import pytest
+
+import backend.db.database as database
+from backend.utils.phash import HammingIndex, NearDuplicateIndex
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "verisight.db"))
+    database.migrate()
+    yield
+    database.close_db()
+
+
+def test_hamming_index_finds_hashes_within_the_distance():
+    index = HammingIndex(max_distance=4)
+    base = 0x0123456789ABCDEF
+    index.add(base, "a")
+    index.add(base ^ 0b1011, "b")  # 3 bits away
+    index.add(base ^ 0xFF00, "c")  # 8 bits away
+    assert index.search(base) == [(0, "a"), (3, "b")]
+
+
+def test_hashes_recorded_by_another_process_are_found(db):
+    web, worker = NearDuplicateIndex(), NearDuplicateIndex()  # one per process in production
+    assert worker.find([0x0123456789ABCDEF]) is None  # loads the (empty) table
+    web.add("original", [0x0123456789ABCDEF])
+    assert worker.find([0x0123456789ABCDEF ^ 0b1]) == ("original", 1)
+
+
+def test_the_same_content_is_indexed_once(db):
+    index = NearDuplicateIndex()
+    index.add("a", [1 << 40, 1 << 20])
+    index.add("a", [1 << 40, 1 << 20])
+    index.find([1 << 40])
+    assert index.stats()["indexed_hashes"] == 2